@@ -0,0 +1,81 @@
+"""
+Rows per second of the insert paths: one INSERT per row, chunked multi-row VALUES, COPY and upsert.
+
+Usage: PYTHONPATH=src python benchmarks/bulk_insert.py [--rows 50000]
+Needs the database of DB_URI, rows go to a temporary benchmark table which is dropped afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable
+from typing import Callable
+
+import sqlalchemy as sa
+from database import database
+from sqlalchemy.ext.declarative import declarative_base
+
+from sdk.repositories import BaseRepository
+
+BenchmarkBase = declarative_base()
+
+
+class BenchmarkItem(BenchmarkBase):
+    __tablename__ = 'benchmark_bulk_insert'
+
+    uuid = sa.Column(sa.String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = sa.Column(sa.String, nullable=False)
+    value = sa.Column(sa.Integer, nullable=False)
+
+
+class BenchmarkRepository(BaseRepository):
+    model = BenchmarkItem
+
+
+def make_items(count: int) -> list:
+    return [{'uuid': str(uuid.uuid4()), 'name': f'item {i}', 'value': i} for i in range(count)]
+
+
+async def measure(name: str, count: int, insert: Callable[[], Awaitable]) -> None:
+    await database.execute(sa.delete(BenchmarkItem))
+    started = time.perf_counter()
+    await insert()
+    elapsed = time.perf_counter() - started
+    print(f'{name:<20} {count:>8} {count / elapsed:>12.0f}')  # noqa: T201
+
+
+async def insert_one_by_one(items: list) -> None:
+    for item in items:
+        await BenchmarkRepository.create(**item).execute()
+
+
+async def insert_values(items: list) -> None:
+    operation = BenchmarkRepository.bulk_create(items)
+    operation.copy_threshold = len(items) + 1
+    await operation.execute()
+
+
+async def upsert(items: list) -> None:
+    await BenchmarkRepository.bulk_create(items).execute()
+    await BenchmarkRepository.upsert([{**item, 'value': -item['value']} for item in items], ['uuid']).execute()
+
+
+async def main(rows: int) -> None:
+    await database.connect()
+    await database.execute(sa.schema.CreateTable(BenchmarkItem.__table__))
+    try:
+        print(f'{"path":<20} {"rows":>8} {"rows/sec":>12}')  # noqa: T201
+        single_rows = min(rows, 2000)
+        await measure('insert per row', single_rows, lambda: insert_one_by_one(make_items(single_rows)))
+        await measure('multi-row VALUES', rows, lambda: insert_values(make_items(rows)))
+        await measure('COPY', rows, lambda: BenchmarkRepository.bulk_create(make_items(rows)).execute())
+        await measure('upsert (2 passes)', rows * 2, lambda: upsert(make_items(rows)))
+    finally:
+        await database.execute(sa.schema.DropTable(BenchmarkItem.__table__))
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50000)
+    asyncio.run(main(parser.parse_args().rows))
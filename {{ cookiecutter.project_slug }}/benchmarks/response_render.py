@@ -0,0 +1,55 @@
+"""
+Rendering a DefaultResponse body: the validating envelope model vs the direct encoder.
+
+Usage: PYTHONPATH=src python benchmarks/response_render.py
+Payloads are paginated pages of users, both renderers are checked to produce the same bytes.
+"""
+import timeit
+import uuid
+from typing import Any
+
+from api.v1.users.schemas import User
+from sdk.responses import DefaultResponse
+from sdk.responses import DefaultResponseSchema
+from sdk.schemas import PaginatedSchema
+
+PAGE_SIZES = (1, 25, 100, 1000, 10000)
+ROWS_PER_ROUND = 100000
+
+
+def make_page(count: int) -> PaginatedSchema:
+    users = [
+        User(
+            uuid=uuid.uuid4(),
+            name=f'User {i}',
+            phone_number=f'+38050{i:07d}',
+            email=f'user{i}@example.com',
+            avatar=f'{uuid.uuid4().hex}_avatar.png' if i % 2 else None,
+        )
+        for i in range(count)
+    ]
+    return PaginatedSchema(total_count=count, page_count=1, next=None, previous=None, results=users)
+
+
+def render_envelope(content: Any) -> bytes:  # noqa: ANN401
+    return DefaultResponseSchema(data=content).json().encode()
+
+
+def main() -> None:
+    response = DefaultResponse(content=None)
+    print(f'{"rows":>6} {"envelope ms":>12} {"direct ms":>10} {"speedup":>8} {"KiB":>8}')  # noqa: T201
+    for size in PAGE_SIZES:
+        page = make_page(size)
+        body = response.render(page)
+        assert body == render_envelope(page), 'Renderers disagree'
+        rounds = max(1, ROWS_PER_ROUND // size)
+        envelope = timeit.timeit(lambda: render_envelope(page), number=rounds) / rounds  # noqa: B023
+        direct = timeit.timeit(lambda: response.render(page), number=rounds) / rounds  # noqa: B023
+        print(  # noqa: T201
+            f'{size:>6} {envelope * 1000:>12.3f} {direct * 1000:>10.3f} {envelope / direct:>7.1f}x'
+            f' {len(body) / 1024:>8.1f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Building response schemas from result rows: validating constructor vs the trusted row mapper.
+
+Usage: PYTHONPATH=src python benchmarks/row_mapping.py
+No database connection is needed, rows are dicts shaped like the User projection.
+Allocated is the memory allocated while a page is built, as counted by tracemalloc.
+"""
+import datetime
+import timeit
+import tracemalloc
+import uuid
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from api.v1.users.schemas import User
+from sdk.mappers import get_row_mapper
+
+PAGE_SIZES = (25, 100, 10000)
+ROWS_PER_ROUND = 100000
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            'uuid': str(uuid.uuid4()),  # UUIDModelMixin.uuid is read as a string
+            'name': f'User {i}',
+            'phone_number': f'+38050{i:07d}',
+            'email': f'user{i}@example.com',
+            'avatar': f'{uuid.uuid4().hex}_avatar.png' if i % 2 else None,
+            'created_at': datetime.datetime.now(datetime.timezone.utc),
+        }
+        for i in range(count)
+    ]
+
+
+def validate(rows: List[Dict[str, Any]]) -> List[User]:
+    return [User(**dict(row)) for row in rows]
+
+
+def map_rows(rows: List[Dict[str, Any]]) -> List[User]:
+    return list(map(get_row_mapper(User), rows))
+
+
+def allocated(build: Callable[[List[Dict[str, Any]]], List[User]], rows: List[Dict[str, Any]]) -> int:
+    tracemalloc.start()
+    try:
+        build(rows)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    print(f'{"rows":>6} {"mode":<9} {"page ms":>9} {"per row us":>11} {"allocated KiB":>14}')  # noqa: T201
+    for size in PAGE_SIZES:
+        rows = make_rows(size)
+        rounds = max(1, ROWS_PER_ROUND // size)
+        for mode, build in (('validate', validate), ('mapper', map_rows)):
+            page_time = timeit.timeit(lambda: build(rows), number=rounds) / rounds  # noqa: B023
+            print(  # noqa: T201
+                f'{size:>6} {mode:<9} {page_time * 1000:>9.3f} {page_time / size * 10**6:>11.2f}'
+                f' {allocated(build, rows) / 1024:>14.1f}',
+            )
+
+
+if __name__ == '__main__':
+    main()
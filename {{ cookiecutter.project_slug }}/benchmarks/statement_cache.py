@@ -0,0 +1,45 @@
+"""
+Per call overhead of building and compiling repository queries, without and with the compiled SQL cache.
+
+Usage: PYTHONPATH=src python benchmarks/statement_cache.py
+No database connection is needed, only the query construction and compilation are measured.
+"""
+import timeit
+import uuid
+
+from database import PostgresConnection
+from database import database
+from databases.backends import postgres
+
+from api.v1.users.repositories import UserRepository
+from sdk.repositories import Q
+
+ROUNDS = 5000
+
+QUERIES = {
+    'get by uuid': lambda: UserRepository.get().where(uuid=uuid.uuid4()).query,
+    'get by phone or email': lambda: UserRepository.get('uuid', 'name')
+    .where(Q(phone_number=str(uuid.uuid4())) | Q(email__iexact=str(uuid.uuid4())))
+    .query,
+    'count by phone': lambda: UserRepository.count().where(phone_number=str(uuid.uuid4())).query,
+}
+
+
+def main() -> None:
+    connection = database._backend.connection()
+    print(f'{"query":<24} {"build us":>9} {"uncached us":>12} {"cached us":>10}')  # noqa: T201
+    for name, build in QUERIES.items():
+        build_time = timeit.timeit(build, number=ROUNDS) / ROUNDS * 10**6
+        uncached = timeit.timeit(
+            lambda: postgres.PostgresConnection._compile(connection, build()),  # noqa: B023
+            number=ROUNDS,
+        )
+        cached = timeit.timeit(lambda: connection._compile(build()), number=ROUNDS)  # noqa: B023
+        print(  # noqa: T201
+            f'{name:<24} {build_time:>9.1f} {uncached / ROUNDS * 10**6:>12.1f} {cached / ROUNDS * 10**6:>10.1f}',
+        )
+    print(PostgresConnection.compiled_cache_stats())  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Full vs compact access token claims: token size, decode time and Redis bytes per session.
+
+Usage: PYTHONPATH=src python benchmarks/tokens.py [--redis]
+With --redis the session entries are written to REDIS_URI and measured with MEMORY USAGE.
+"""
+import argparse
+import asyncio
+import timeit
+import uuid
+
+import jwt
+from config import settings
+
+from api.v1.auth.schemas import Session
+from api.v1.auth.services import TokenService
+from api.v1.users.schemas import User
+
+SECRET_KEY = 'benchmark-secret-key'
+ROUNDS = 10000
+
+
+def make_tokens(user: User, compact: bool) -> tuple:
+    access_token = TokenService.create_access(
+        payload=None if compact else user.dict(),
+        secret_key=SECRET_KEY,
+        sub=str(user.uuid),
+        expires_in=Session.get_access_token_expires(),
+        algorithm=settings.AUTH_JWT_ALGORITHM,
+    )
+    refresh_token = TokenService.create_refresh(
+        secret_key=SECRET_KEY,
+        sub=str(user.uuid),
+        expires_in=Session.get_refresh_token_expires(),
+        algorithm=settings.AUTH_JWT_ALGORITHM,
+    )
+    return access_token, refresh_token
+
+
+def decode(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[settings.AUTH_JWT_ALGORITHM])
+
+
+def session_entry(access_token: str, refresh_token: str) -> tuple:
+    access_payload, refresh_payload = decode(access_token), decode(refresh_token)
+    if 'v' in access_payload:
+        return f'session:{refresh_payload["jti"]}', access_payload['jti']
+    return f'{refresh_token}:{access_token}:{access_payload["sub"]}', access_payload['sub']
+
+
+async def redis_memory_usage(key: str, value: str) -> int:
+    from cache import RedisBackend
+
+    redis = await RedisBackend.create_pool(settings.REDIS_URI)
+    try:
+        await redis.set(key, value, expire=60)
+        return await redis.memory_usage(key)
+    finally:
+        await redis.delete(key)
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--redis', action='store_true', help='Measure MEMORY USAGE in REDIS_URI')
+    args = parser.parse_args()
+
+    user = User(
+        uuid=uuid.uuid4(),
+        name='Benchmark User',
+        phone_number='+380501234567',
+        email='benchmark.user@example.com',
+        avatar='3f2a9c1d_avatar.png',
+    )
+    print(f'{"mode":<8} {"token bytes":>12} {"decode us":>10} {"session bytes":>14}')  # noqa: T201
+    for mode, compact in (('full', False), ('compact', True)):
+        access_token, refresh_token = make_tokens(user, compact)
+        decode_time = timeit.timeit(lambda: decode(access_token), number=ROUNDS) / ROUNDS * 10**6  # noqa: B023
+        key, value = session_entry(access_token, refresh_token)
+        if args.redis:
+            session_bytes = asyncio.run(redis_memory_usage(key, value))
+        else:
+            session_bytes = len(key) + len(value)
+        print(f'{mode:<8} {len(access_token):>12} {decode_time:>10.1f} {session_bytes:>14}')  # noqa: T201
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,26 @@
+import asyncio
+import contextlib
+import copy
+import hashlib
+import hmac
 import random
 import string
+import time
 import uuid
 from datetime import datetime
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 import jwt
+from aioredis.client import Pipeline
+from aioredis.client import PubSub
+from aioredis.exceptions import RedisError
+from cache import MISSING
+from cache import BloomFilter
+from cache import LocalCache
 from cache import RedisBackend
 from config import Environment
 from config import settings
@@ -15,11 +29,17 @@ from api.v1.auth.schemas import Session
 from api.v1.users.schemas import User
 from api.v1.users.schemas import UserCreate
 from api.v1.users.services import UserService
-from sdk.exceptions.exceptions import make_error
+from sdk.exceptions.catalogue import error_catalogue
 from sdk.responses import ResponseStatus
-from sdk.schemas import TrackingSchemaMixin
 from sdk.utils import DefaultJSONEncoder
 
+token_invalid = error_catalogue.register(ResponseStatus.INVALID_ACCESS_OR_REFRESH_TOKEN, 'Token invalid or expired')
+invalid_code = error_catalogue.register(
+    ResponseStatus.AUTHORIZATION_CODE_INVALID,
+    'Invalid authorization code.',
+    code='Invalid code.',
+)
+
 
 class NotificationService:
     @classmethod
@@ -32,21 +52,37 @@ class NotificationService:
 
 
 class TokenService:
+    verified_tokens: LocalCache = LocalCache(settings.LOCAL_CACHE_MAX_SIZE)
+    compact_claims_version: int = 1
+
+    @staticmethod
+    def get_issued_at() -> float:
+        """Issue time with millisecond precision, so a revocation epoch separates tokens of the same second."""
+        return round(time.time(), 3)
+
     @classmethod
     def create_access(
         cls,
-        payload: Dict[str, Any],
+        payload: Optional[Dict[str, Any]],
         secret_key: str,
         sub: str,
         expires_in: datetime,
         algorithm: str,
     ) -> str:
+        """
+        Without payload the token carries compact claims: only sub and the claims version,
+        the user is rebuilt from the cached profile.
+        """
         body = {
-            'iat': datetime.utcnow(),
+            'iat': cls.get_issued_at(),
             'exp': expires_in,
             'sub': sub,
-            'data': payload,
+            'jti': uuid.uuid4().hex,
         }
+        if payload is None:
+            body['v'] = cls.compact_claims_version
+        else:
+            body['data'] = payload
         return jwt.encode(
             payload=body,
             key=secret_key,
@@ -63,9 +99,10 @@ class TokenService:
         algorithm: str,
     ) -> str:
         body = {
-            'iat': datetime.utcnow(),
+            'iat': cls.get_issued_at(),
             'exp': expires_in,
             'sub': sub,
+            'jti': uuid.uuid4().hex,
         }
         return jwt.encode(
             payload=body,
@@ -74,20 +111,262 @@ class TokenService:
             json_encoder=DefaultJSONEncoder,
         )
 
+    @staticmethod
+    def get_digest(token: str) -> bytes:
+        """Key of the token in the verified tokens cache, compute it once per request and pass it along."""
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def _get_verified(
+        cls,
+        token: str,
+        digest: Optional[bytes] = None,
+    ) -> Optional[List[Any]]:
+        """
+        Verified claims of the token and the user built from them, cached until the token expires.
+
+        Only tokens that passed signature and expiration checks are cached.
+        The entry is shared between requests, callers get copies of it.
+        """
+        if digest is None:
+            digest = cls.get_digest(token)
+        verified = cls.verified_tokens.get(digest)
+        if verified is not MISSING and verified[0]['exp'] > time.time():
+            return verified
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.AUTH_JWT_ALGORITHM])
+        except jwt.PyJWTError:
+            return None
+        verified = [payload, None]
+        if 'exp' in payload:
+            cls.verified_tokens.set(digest, verified, ttl=payload['exp'] - time.time())
+        return verified
+
     @classmethod
     def get_payload(
         cls,
         token: str,
+        digest: Optional[bytes] = None,
     ) -> Optional[Dict[str, Any]]:
+        verified = cls._get_verified(token, digest)
+        return copy.deepcopy(verified[0]) if verified else None
+
+    @staticmethod
+    def get_claims(token: str) -> Optional[Dict[str, Any]]:
+        """
+        Claims of a token that may have expired, the signature is still verified.
+
+        Used to match an access token with its refresh token, clients refresh once the access token expired.
+        """
         try:
-            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.AUTH_JWT_ALGORITHM])
+            return jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.AUTH_JWT_ALGORITHM],
+                options={'verify_exp': False},
+            )
         except jwt.PyJWTError:
             return None
 
+    @classmethod
+    def get_user(
+        cls,
+        token: str,
+        digest: Optional[bytes] = None,
+    ) -> Optional[User]:
+        """User from the access token claims, built once per token."""
+        verified = cls._get_verified(token, digest)
+        if verified is None or 'data' not in verified[0]:
+            return None
+        if verified[1] is None:
+            verified[1] = User(**verified[0]['data'])
+        return verified[1].copy()
+
+
+class RevocationService:
+    """
+    Token revocation: a per-user epoch in milliseconds (tokens issued before it are invalid)
+    and a jti denylist for single sessions, both stored in Redis. The denylist is a sorted set
+    scored by the token expiry, trimmed of expired tokens on every write and on synchronization.
+
+    Each worker keeps a local tier in front of Redis: an LRU of user epochs, including
+    negative entries, and a Bloom filter of revoked jti. Revocations are broadcast over
+    pub/sub, so the local tier is only trusted while the listener is subscribed.
+    """
+
+    channel: str = 'auth:revocations'
+    denylist_key: str = 'bl:jtis'
+    epochs: LocalCache = LocalCache(settings.LOCAL_CACHE_MAX_SIZE, ttl=settings.LOCAL_CACHE_TTL)
+    revoked_jtis: BloomFilter = BloomFilter(
+        settings.REVOCATION_FILTER_CAPACITY,
+        settings.REVOCATION_FILTER_ERROR_RATE,
+    )
+    is_synced: bool = False
+    _generation: int = 0
+    _synchronized_at: float = 0.0
+    _listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def get_revocation_key(user_id: Any) -> str:  # noqa: ANN401
+        return f'revoked:{user_id}'
+
+    @classmethod
+    def revoke_token(cls, pipe: Pipeline, payload: Dict[str, Any]) -> Pipeline:
+        pipe.zadd(cls.denylist_key, {payload['jti']: payload['exp']})
+        pipe.zremrangebyscore(cls.denylist_key, '-inf', int(time.time()))
+        return pipe.publish(cls.channel, f'jti:{payload["jti"]}')
+
+    @classmethod
+    def revoke_user(cls, pipe: Pipeline, user_id: Any) -> Pipeline:  # noqa: ANN401
+        expire = settings.JWT_REFRESH_TOKEN_EXP_DELTA_MINUTES * 60
+        return pipe.set(cls.get_revocation_key(user_id), int(time.time() * 1000), ex=expire).publish(
+            cls.channel,
+            f'user:{user_id}',
+        )
+
+    @classmethod
+    async def is_revoked(
+        cls,
+        redis: RedisBackend,
+        *payloads: Dict[str, Any],
+    ) -> bool:
+        """Check tokens of the same user, Redis is queried at most once and only on local misses."""
+        user_id = payloads[0]['sub']
+        jtis = [payload['jti'] for payload in payloads if payload.get('jti')]
+        epoch = MISSING
+        if cls.is_synced:
+            epoch = cls.epochs.get(user_id)
+            jtis = [jti for jti in jtis if jti in cls.revoked_jtis]
+        if jtis or epoch is MISSING:
+            generation = cls._generation
+            async with redis.pipeline(transaction=False) as pipe:
+                for jti in jtis:
+                    pipe.zscore(cls.denylist_key, jti)
+                if epoch is MISSING:
+                    pipe.get(cls.get_revocation_key(user_id))
+                values = await pipe.execute()
+            if any(value is not None for value in values[: len(jtis)]):
+                return True
+            if epoch is MISSING:
+                epoch = values[-1]
+                if cls.is_synced and generation == cls._generation:
+                    cls.epochs.set(user_id, epoch)
+        return epoch is not None and any(round(payload['iat'] * 1000) < int(epoch) for payload in payloads)
+
+    @classmethod
+    async def start(cls, redis: RedisBackend) -> None:
+        cls._listener = asyncio.create_task(cls._listen(redis))
+
+    @classmethod
+    async def stop(cls) -> None:
+        cls.is_synced = False
+        if cls._listener is None:
+            return
+        cls._listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await cls._listener
+        cls._listener = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            'synced': cls.is_synced,
+            'epochs': cls.epochs.stats(),
+            'revoked_jtis': cls.revoked_jtis.stats(),
+        }
+
+    @classmethod
+    async def _listen(cls, redis: RedisBackend) -> None:
+        while True:
+            # Subscribe confirmations are kept, so None from get_message means the buffer is empty
+            pubsub = redis.pubsub(ignore_subscribe_messages=False)
+            try:
+                await pubsub.subscribe(cls.channel)
+                await cls._synchronize(redis, pubsub)
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None and message['type'] == 'message':
+                        cls._apply(message['data'].decode())
+                    if cls.revoked_jtis.is_saturated and cls._can_synchronize():
+                        await cls._synchronize(redis, pubsub)
+            except (RedisError, OSError):
+                cls.is_synced = False
+                await asyncio.sleep(1)
+            finally:
+                # Also on errors that stop the listener, the local tier is not updated anymore
+                cls.is_synced = False
+                await pubsub.close()
+
+    @classmethod
+    def _can_synchronize(cls) -> bool:
+        """
+        A saturated filter only gives more false positives, i.e. extra Redis lookups,
+        so it is rebuilt at most once per REVOCATION_RESYNC_INTERVAL.
+        """
+        return time.monotonic() - cls._synchronized_at >= settings.REVOCATION_RESYNC_INTERVAL
+
+    @classmethod
+    async def _synchronize(cls, redis: RedisBackend, pubsub: PubSub) -> None:
+        """
+        Rebuild the local tier from Redis, with a filter sized for twice the revoked jti.
+
+        Messages received meanwhile are buffered by the subscription, the local tier
+        is trusted again once they are applied.
+        """
+        cls.is_synced = False
+        cls._generation += 1
+        cls._synchronized_at = time.monotonic()
+        cls.epochs.clear()
+        now = int(time.time())
+        async with redis.pipeline() as pipe:
+            pipe.zremrangebyscore(cls.denylist_key, '-inf', now)
+            pipe.zrangebyscore(cls.denylist_key, now, '+inf')
+            _, jtis = await pipe.execute()
+        revoked_jtis = BloomFilter(
+            max(settings.REVOCATION_FILTER_CAPACITY, len(jtis) * 2),
+            settings.REVOCATION_FILTER_ERROR_RATE,
+        )
+        for jti in jtis:
+            revoked_jtis.add(jti.decode())
+        cls.revoked_jtis = revoked_jtis
+        message = await pubsub.get_message(timeout=0)
+        while message is not None:
+            if message['type'] == 'message':
+                cls._apply(message['data'].decode())
+            message = await pubsub.get_message(timeout=0)
+        cls.is_synced = True
+
+    @classmethod
+    def _apply(cls, message: str) -> None:
+        kind, _, value = message.partition(':')
+        cls._generation += 1
+        if kind == 'jti':
+            cls.revoked_jtis.add(value)
+        elif kind == 'user':
+            cls.epochs.delete(value)
+
 
 class SessionService:
     user_schema: User = User
 
+    @staticmethod
+    def get_session_entry(refresh_token: str, access_token: str) -> Tuple[str, str]:
+        """Redis key and value of the session, short jti based ones for compact claims."""
+        refresh_payload = TokenService.get_payload(refresh_token)
+        access_payload = TokenService.get_claims(access_token)
+        if 'v' in access_payload:
+            return f'session:{refresh_payload["jti"]}', access_payload['jti']
+        return f'{refresh_token}:{access_token}:{access_payload["sub"]}', access_payload['sub']
+
+    @staticmethod
+    def get_profile_key(user_id: Any) -> str:  # noqa: ANN401
+        return f'profile:{user_id}'
+
+    @staticmethod
+    def get_index_key(user_id: Any) -> str:  # noqa: ANN401
+        """Sorted set of the user's session keys, scored by their expiry timestamp."""
+        return f'sessions:{user_id}'
+
     @classmethod
     async def create_session(
         cls,
@@ -96,7 +375,7 @@ class SessionService:
     ) -> Session:
         expires_in = Session.get_access_token_expires()
         access_token = TokenService.create_access(
-            payload=user.dict(),
+            payload=None if settings.AUTH_JWT_COMPACT_CLAIMS else user.dict(),
             secret_key=settings.SECRET_KEY,
             sub=str(user.uuid),
             expires_in=expires_in,
@@ -108,11 +387,22 @@ class SessionService:
             expires_in=Session.get_refresh_token_expires(),
             algorithm=settings.AUTH_JWT_ALGORITHM,
         )
-        await redis.set(
-            f'{refresh_token}:{access_token}:{user.uuid}',
-            str(user.uuid),
-            expire=settings.JWT_REFRESH_TOKEN_EXP_DELTA_MINUTES,
-        )
+        session_key, session_value = cls.get_session_entry(refresh_token, access_token)
+        index_key = cls.get_index_key(user.uuid)
+        expire = settings.JWT_REFRESH_TOKEN_EXP_DELTA_MINUTES * 60
+        now = int(time.time())
+        async with redis.pipeline() as pipe:
+            pipe.set(session_key, session_value, ex=expire)
+            pipe.zadd(index_key, {session_key: now + expire})
+            pipe.zremrangebyscore(index_key, '-inf', now)
+            pipe.expire(index_key, expire)
+            if settings.AUTH_JWT_COMPACT_CLAIMS:
+                pipe.set(
+                    cls.get_profile_key(user.uuid),
+                    user.json(),
+                    ex=settings.AUTH_JWT_ACCESS_TOKEN_EXP_DELTA_MINUTES * 60,
+                )
+            await pipe.execute()
         return Session(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -120,14 +410,60 @@ class SessionService:
         )
 
     @classmethod
-    async def logout(cls, access_token: str, redis: RedisBackend) -> None:
-        payload = TokenService.get_payload(access_token)
-        expires_in = payload['exp'] if payload else 0
+    async def get_profile(
+        cls,
+        user_id: Any,  # noqa: ANN401
+        redis: RedisBackend,
+    ) -> User:
+        profile = await redis.get(cls.get_profile_key(user_id))
+        if profile is not None:
+            return cls.user_schema.parse_raw(profile)
+        user = await UserService.get_user(uuid=user_id)
         await redis.set(
-            f'bl:{access_token}',
-            access_token,
-            expire=expires_in,
+            cls.get_profile_key(user_id),
+            user.json(),
+            expire=settings.AUTH_JWT_ACCESS_TOKEN_EXP_DELTA_MINUTES * 60,
         )
+        return user
+
+    @classmethod
+    async def forget_profile(
+        cls,
+        user_id: Any,  # noqa: ANN401
+        redis: RedisBackend,
+    ) -> None:
+        await redis.delete(cls.get_profile_key(user_id))
+
+    @classmethod
+    async def get_user(
+        cls,
+        access_token: str,
+        redis: RedisBackend,
+        digest: Optional[bytes] = None,
+    ) -> Optional[User]:
+        """
+        User of the access token, rebuilt from the cached profile for compact claims.
+
+        The profile is read from Redis on every request and not kept with the token,
+        so forget_profile takes effect immediately on every worker.
+        """
+        if digest is None:
+            digest = TokenService.get_digest(access_token)
+        user = TokenService.get_user(access_token, digest)
+        if user is not None:
+            return user
+        payload = TokenService.get_payload(access_token, digest)
+        if payload is None or 'v' not in payload:
+            return None
+        return await cls.get_profile(payload['sub'], redis)
+
+    @classmethod
+    async def logout(cls, access_token: str, redis: RedisBackend) -> None:
+        payload = TokenService.get_payload(access_token)
+        if payload is None or not payload.get('jti'):
+            return
+        async with redis.pipeline() as pipe:
+            await RevocationService.revoke_token(pipe, payload).execute()
 
     @classmethod
     async def logout_all(
@@ -135,16 +471,24 @@ class SessionService:
         user_id: uuid.UUID,
         redis: RedisBackend,
     ) -> None:
-        key = f'*:*:{user_id}'
-        keys = await redis.keys(key)
-        expire = (datetime.now() - Session.get_access_token_expires()).seconds
-        for key in keys:
-            access_token = key.decode('utf-8').split(':')[2]
-            await redis.set(
-                f'bl:{access_token}',
-                access_token,
-                expire=expire,
+        """Revoke every access and refresh token of the user issued until now."""
+        async with redis.pipeline() as pipe:
+            await RevocationService.revoke_user(pipe, user_id).delete(cls.get_index_key(user_id)).execute()
+
+    @classmethod
+    async def list_sessions(
+        cls,
+        user_id: uuid.UUID,
+        redis: RedisBackend,
+    ) -> List[str]:
+        """Active session keys of the user, expired entries are pruned from the index."""
+        index_key = cls.get_index_key(user_id)
+        now = int(time.time())
+        async with redis.pipeline() as pipe:
+            _, session_keys = await (
+                pipe.zremrangebyscore(index_key, '-inf', now).zrangebyscore(index_key, now, '+inf').execute()
             )
+        return [session_key.decode() for session_key in session_keys]
 
     @classmethod
     async def refresh_session(
@@ -153,24 +497,23 @@ class SessionService:
         access_token: str,
         refresh_token: str,
     ) -> Session:
-        token_invalid = make_error(
-            custom_code=ResponseStatus.INVALID_ACCESS_OR_REFRESH_TOKEN,
-            message='Token invalid or expired',
-        )
         refresh_payload = TokenService.get_payload(refresh_token)
         if refresh_payload is None:
-            raise token_invalid
+            raise token_invalid()
         user_id = refresh_payload.get('sub')
-        if user_id is None:
-            raise token_invalid
+        access_payload = TokenService.get_claims(access_token)
+        if user_id is None or access_payload is None or access_payload.get('sub') != user_id:
+            raise token_invalid()
         user = await UserService.get_user(uuid=user_id)
-        in_blacklist = await redis.get(f'bl:{access_token}')
-        if in_blacklist:
-            raise token_invalid
-        session = await redis.get(f'{refresh_token}:{access_token}:{user_id}')
-        if session is None:
-            raise token_invalid
-        await cls.logout(access_token, redis)
+        if await RevocationService.is_revoked(redis, access_payload, refresh_payload):
+            raise token_invalid()
+        session_key, session_value = cls.get_session_entry(refresh_token, access_token)
+        session = await redis.get(session_key)
+        if session is None or session.decode() != session_value:
+            raise token_invalid()
+        async with redis.pipeline() as pipe:
+            RevocationService.revoke_token(pipe, access_payload)
+            await pipe.delete(session_key).zrem(cls.get_index_key(user_id), session_key).execute()
         return await cls.create_session(user=user, redis=redis)
 
 
@@ -182,50 +525,22 @@ class AuthorizationService:
         return ''.join(random.choices(string.digits, k=6))
 
     @classmethod
-    async def is_blocked(
+    def get_otp_key(
         cls,
-        service_name: str,
-        ip: str,
-        redis: RedisBackend,
-    ) -> bool:
-        timeout_key = f'{service_name}:timeout:{ip}'
-        timeout = await redis.get(timeout_key)
-
-        if timeout is not None:
-            return True
-
-        rate_key = f'{service_name}:rate:{ip}'
-        rate = await redis.get(rate_key)
-
-        if rate is not None:
-            rate = int(rate)
-            if rate > settings.OTP_RATE_LIMIT:
-                await redis.set(timeout_key, 1, expire=60 * 5)
-                return True
-        else:
-            await redis.set(rate_key, 1, expire=60)
-
-        await redis.incr(rate_key)
-        return False
+        code: str,
+    ) -> str:
+        digest = hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+        return f'otp:attempt:{digest}'
 
     @classmethod
     async def send_otp(
         cls,
         phone_number: str,
-        ip: str,
         redis: RedisBackend,
     ) -> bool:
-        if await cls.is_blocked('login', ip, redis):
-            raise make_error(
-                custom_code=ResponseStatus.TOO_MANY_REQUESTS,
-                message='Too many attempts. Try again in 5 minutes',
-            )
         code = cls.generate_code()
-        await redis.set(
-            f'otp:attempt:{phone_number}:{code}',
-            phone_number,
-            expire=settings.OTP_EXPIRE,
-        )
+        while not await redis.setnx(cls.get_otp_key(code), phone_number, expire=settings.OTP_EXPIRE):
+            code = cls.generate_code()  # The code is pending for another phone number
         sms_message = f'Code: {code}'
         if settings.ENVIRONMENT == Environment.LOCAL:
             print(f'Phone Number: {phone_number}, Code: {code}')  # noqa: T201
@@ -236,37 +551,21 @@ class AuthorizationService:
     async def verify_code(
         cls,
         code: str,
-        ip: str,
         redis: RedisBackend,
     ) -> str:
-        if await cls.is_blocked('verify', ip, redis):
-            raise make_error(
-                custom_code=ResponseStatus.TOO_MANY_REQUESTS,
-                message='Too many requests',
-            )
-        pattern = f'otp:attempt:*:{code}'
-        attempts = await redis.keys(pattern)
-        if not attempts:
-            raise make_error(
-                custom_code=ResponseStatus.AUTHORIZATION_CODE_INVALID,
-                message='Invalid authorization code.',
-                code='Invalid code.',
-            )
-        key = attempts[0]
-        phone_number = await redis.get(key)
-        await redis.delete(key)
-        return phone_number.decode()  # noqa: R504
+        phone_number = await redis.getdel(cls.get_otp_key(code))
+        if phone_number is None:
+            raise invalid_code()
+        return phone_number.decode()
 
     @classmethod
     async def register(
         cls,
         user: UserCreate,
-        tracking_params: TrackingSchemaMixin,
         redis: RedisBackend,
     ) -> bool:
         user = await UserService.create_user(user_data=user)
         return await cls.send_otp(
             phone_number=user.phone_number,
-            ip=tracking_params.ip_address,
             redis=redis,
         )
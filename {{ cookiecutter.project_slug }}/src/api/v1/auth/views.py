@@ -4,8 +4,8 @@ from config import settings
 from dependencies import cache_storage
 from dependencies import get_access_token
 from dependencies import get_authenticated_user
-from dependencies import get_tracking_data
 from dependencies import get_transaction
+from dependencies import rate_limit
 from fastapi import Body
 from fastapi import Depends
 from fastapi_utils.cbv import cbv
@@ -20,16 +20,32 @@ from api.v1.users.services import UserService
 from sdk.responses import DefaultResponse
 from sdk.responses import DefaultResponseSchema
 from sdk.schemas import PhoneNumberSchemaMixin
-from sdk.schemas import TrackingSchemaMixin
 
 router = InferringRouter()
 
+login_rate_limit = rate_limit(
+    'login',
+    limit=settings.OTP_RATE_LIMIT,
+    period=settings.OTP_RATE_PERIOD,
+    block=settings.OTP_BLOCK_TIMEOUT,
+    message=f'Too many attempts. Try again in {settings.OTP_BLOCK_TIMEOUT // 60} minutes',
+)
+verify_rate_limit = rate_limit(
+    'verify',
+    limit=settings.OTP_RATE_LIMIT,
+    period=settings.OTP_RATE_PERIOD,
+    block=settings.OTP_BLOCK_TIMEOUT,
+)
+
 
 @cbv(router)
 class AuthorizationViews:
-    tracking_params: TrackingSchemaMixin = Depends(get_tracking_data)
-
-    @router.post('/register', name='auth:register', response_model=DefaultResponseSchema[bool])
+    @router.post(
+        '/register',
+        name='auth:register',
+        response_model=DefaultResponseSchema[bool],
+        dependencies=[Depends(login_rate_limit)],
+    )
     async def register(
         self,
         *,
@@ -40,13 +56,17 @@ class AuthorizationViews:
         async with transaction:
             success = await AuthorizationService.register(
                 user_data,
-                self.tracking_params,
                 redis,
             )
 
         return DefaultResponse(content=success)
 
-    @router.post('/login', name='auth:login', response_model=DefaultResponseSchema[bool])
+    @router.post(
+        '/login',
+        name='auth:login',
+        response_model=DefaultResponseSchema[bool],
+        dependencies=[Depends(login_rate_limit)],
+    )
     async def login(
         self,
         *,
@@ -61,13 +81,17 @@ class AuthorizationViews:
         user = await UserService.get_user(phone_number=user_data.phone_number)
         success = await AuthorizationService.send_otp(
             phone_number=user.phone_number,
-            ip=self.tracking_params.ip_address,
             redis=redis,
         )
 
         return DefaultResponse(content=success)
 
-    @router.post('/verify', name='auth:verify', response_model=DefaultResponseSchema[Session])
+    @router.post(
+        '/verify',
+        name='auth:verify',
+        response_model=DefaultResponseSchema[Session],
+        dependencies=[Depends(verify_rate_limit)],
+    )
     async def verify(
         self,
         *,
@@ -79,7 +103,6 @@ class AuthorizationViews:
         else:
             phone_number = await AuthorizationService.verify_code(
                 code=code,
-                ip=self.tracking_params.ip_address,
                 redis=redis,
             )
         user = await UserService.get_user(phone_number=phone_number)
@@ -2,3 +2,4 @@ class HealthCheck:
     OK_STATUS: str = 'working'
     DISK_USAGE_MAX = 90  # percentage
     MEMORY_MIN = 100  # Mb
+    DB_POOL_ACQUIRE_MAX = 100  # ms, p95 wait for a connection of a saturated pool
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from api.v1.healthcheck.config import HealthCheck
 from sdk.schemas import BaseSchema
 
@@ -10,3 +12,23 @@ class HealthCheckStatuses(BaseSchema):
 
     def is_all_success(self: 'HealthCheckStatuses') -> bool:
         return all(value == HealthCheck.OK_STATUS for _, value in self.__iter__())
+
+
+class RedisPoolStats(BaseSchema):
+    in_use: int
+    idle: int
+    created: int
+    max_connections: Optional[int] = None
+
+
+class DatabasePoolStats(BaseSchema):
+    size: int = 0
+    idle: int = 0
+    in_use: int = 0
+    min_size: int = 0
+    max_size: int = 0
+    waiting: int
+    acquired: int
+    acquire_avg_ms: float
+    acquire_p95_ms: float
+    acquire_max_ms: float
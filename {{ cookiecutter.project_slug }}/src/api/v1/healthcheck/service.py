@@ -22,6 +22,17 @@ async def check_database() -> str:
     return HealthCheck.OK_STATUS
 
 
+def check_database_pool() -> str:
+    stats = database.pool_stats()['primary']
+    if stats['waiting'] and stats['acquire_p95_ms'] >= HealthCheck.DB_POOL_ACQUIRE_MAX:
+        return '{waiting} tasks wait for a database connection, p95 acquire {p95:.0f} ms exceeds {threshold} ms'.format(
+            waiting=stats['waiting'],
+            p95=stats['acquire_p95_ms'],
+            threshold=HealthCheck.DB_POOL_ACQUIRE_MAX,
+        )
+    return HealthCheck.OK_STATUS
+
+
 def check_memory_usage() -> str:
     memory = psutil.virtual_memory()
     if HealthCheck.MEMORY_MIN and memory.available < (HealthCheck.MEMORY_MIN * 1024 * 1024):
@@ -1,9 +1,16 @@
+from typing import Any
+from typing import Dict
+
 from cache import RedisBackend
+from database import PostgresConnection
+from database import database
 from dependencies import cache_storage
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import status
 
+from api.v1.auth.services import RevocationService
+from api.v1.auth.services import TokenService
 from api.v1.healthcheck import schemas
 from api.v1.healthcheck import service
 from sdk.responses import DefaultResponse
@@ -35,6 +42,43 @@ async def redis_check(redis_client: RedisBackend = Depends(cache_storage)) -> De
     return DefaultResponse(content=await service.check_redis(redis_client))
 
 
+@router.get('/redis_pool', response_model=DefaultResponseSchema[schemas.RedisPoolStats])
+async def redis_pool_stats(redis_client: RedisBackend = Depends(cache_storage)) -> DefaultResponse:
+    """Счетчики соединений пула Redis для подбора его размера под нагрузкой"""
+    return DefaultResponse(content=schemas.RedisPoolStats(**redis_client.pool_stats()))
+
+
+@router.get('/db_pool', response_model=DefaultResponseSchema[Dict[str, schemas.DatabasePoolStats]])
+async def database_pool_stats() -> DefaultResponse:
+    """Счетчики соединений пулов БД и время ожидания соединения для подбора их размера под нагрузкой"""
+    return DefaultResponse(
+        content={name: schemas.DatabasePoolStats(**stats) for name, stats in database.pool_stats().items()},
+    )
+
+
+@router.get('/db_pool/saturation', response_model=DefaultResponseSchema[str])
+async def database_pool_saturation() -> DefaultResponse:
+    """Эндпоинт для проверки насыщения пула БД, не входит в liveness: перезапуск воркера очередь не разгрузит"""
+    return DefaultResponse(content=service.check_database_pool())
+
+
+@router.get('/local_cache', response_model=DefaultResponseSchema[Dict[str, Any]])
+async def local_cache_stats() -> DefaultResponse:
+    """Счетчики попаданий локального кеша воркера для его настройки"""
+    return DefaultResponse(
+        content={
+            'verified_tokens': TokenService.verified_tokens.stats(),
+            'revocation': RevocationService.stats(),
+        },
+    )
+
+
+@router.get('/statement_cache', response_model=DefaultResponseSchema[Dict[str, Any]])
+async def statement_cache_stats() -> DefaultResponse:
+    """Счетчики попаданий кеша скомпилированных SQL запросов"""
+    return DefaultResponse(content=PostgresConnection.compiled_cache_stats())
+
+
 @router.get('/celery', response_model=DefaultResponseSchema[str])
 async def celery_check() -> DefaultResponse:
     return DefaultResponse(content=service.celery_check())
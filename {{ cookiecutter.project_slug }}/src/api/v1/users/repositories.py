@@ -1,6 +1,12 @@
+from config import settings
+
+from api.v1.users import schemas
 from api.v1.users.models import User
 from sdk.repositories import BaseRepository
 
 
 class UserRepository(BaseRepository):
     model: User = User
+    projections = (schemas.User,)
+    # Users are loaded by a single uuid, so a batch is a per-user cache entry
+    loader_cache_ttl = settings.QUERY_CACHE_TTL
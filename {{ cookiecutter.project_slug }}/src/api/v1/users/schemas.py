@@ -29,6 +29,9 @@ class User(UUIDSchemaMixin):
     avatar: Optional[str] = None
     avatar_url: Optional[str] = None
 
+    class Config:
+        computed_fields = {'avatar_url': ('avatar',)}
+
     @validator('avatar_url', pre=True, always=True)
     def assemble_avatar_full_path(
         cls,  # noqa: RSPEC-5720
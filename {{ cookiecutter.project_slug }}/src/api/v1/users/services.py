@@ -7,6 +7,7 @@ from api.v1.users.schemas import User
 from api.v1.users.schemas import UserCreate
 from api.v1.users.schemas import UserUpdate
 from sdk.exceptions.exceptions import make_error
+from sdk.mappers import get_row_mapper
 from sdk.responses import ResponseStatus
 
 
@@ -31,24 +32,31 @@ class UserService:
         cls,
         **kwargs,
     ) -> User:
-        user = await cls.repository.get().where(**kwargs).execute()
+        if kwargs.keys() == {'uuid'}:
+            user = await cls.repository.load(kwargs['uuid'])
+        else:
+            user = await cls.repository.get(schema=User).where(**kwargs).cached().execute()
         if not user:
             raise make_error(
                 custom_code=ResponseStatus.USER_NOT_FOUND,
                 message='User not found',
             )
-        return User(**user)
+        return get_row_mapper(User)(user)
 
     @classmethod
     async def create_user(
         cls,
         user_data: UserCreate,
     ) -> User:
-        if await cls.repository.count().where(phone_number=user_data.phone_number).execute():
+        user_uuid = (
+            await cls.repository.create(**user_data.dict(), uuid=uuid.uuid4())
+            .on_conflict_do_nothing('phone_number')
+            .returning('uuid')
+            .execute()
+        )
+        if user_uuid is None:
             raise make_error(
                 custom_code=ResponseStatus.USER_ALREADY_EXISTS,
                 message='User with this phone number already exists',
             )
-        user_uuid = uuid.uuid4()
-        await cls.repository.create(**user_data.dict(), uuid=user_uuid).execute()
         return User(**user_data.dict(), uuid=user_uuid)
@@ -1,8 +1,11 @@
+from cache import RedisBackend
+from dependencies import cache_storage
 from dependencies import get_authenticated_user
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi_utils.cbv import cbv
 
+from api.v1.auth.services import SessionService
 from api.v1.users.schemas import User
 from api.v1.users.schemas import UserUpdate
 from api.v1.users.services import UserService
@@ -36,10 +39,12 @@ class UserViews:
     async def update_me(
         self,
         *,
+        redis: RedisBackend = Depends(cache_storage),
         data: UserUpdate,
     ) -> DefaultResponse:
         await UserService.update_me(
             user_uuid=self.authenticated_user.uuid,
             update_data=data,
         )
+        await SessionService.forget_profile(self.authenticated_user.uuid, redis)
         return DefaultResponse(content=True)
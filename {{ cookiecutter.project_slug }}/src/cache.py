@@ -1,31 +1,94 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
 from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import Union
 
+from aioredis import ConnectionPool
 from aioredis import Redis
+from aioredis.client import Pipeline
+from aioredis.client import PubSub
+from aioredis.client import Script
+
+MISSING = object()
 
 
 class RedisBackend:
     """Setup the Redis connection for the backend using aioredis"""
 
-    def __init__(self, redis: Redis) -> None:
+    def __init__(self, redis: Optional[Redis] = None) -> None:
         self._redis = redis
+        self._scripts: Dict[str, Script] = {}
 
     @staticmethod
-    async def create_pool(uri: str) -> 'RedisBackend':
-        redis = await Redis.from_url(uri)
-        return RedisBackend(redis)
+    async def create_pool(uri: str, **pool_options) -> 'RedisBackend':
+        backend = RedisBackend()
+        await backend.connect(uri, **pool_options)
+        return backend
+
+    @property
+    def is_connected(self) -> bool:
+        return self._redis is not None
+
+    async def connect(self, uri: str, **pool_options) -> None:
+        """
+        Create a bounded connection pool, shared by every user of this backend.
+
+        :param uri: Redis connection URI
+        :param pool_options: options of aioredis.ConnectionPool,
+        e.g. max_connections, socket_timeout, health_check_interval
+        """
+        pool = ConnectionPool.from_url(uri, **pool_options)
+        self._redis = Redis(connection_pool=pool)
 
     async def close(self) -> None:
+        if self._redis is None:
+            return
         await self._redis.close()
+        await self._redis.connection_pool.disconnect()
+        self._redis = None
+        self._scripts = {}
+
+    @property
+    def redis(self) -> Redis:
+        assert self._redis is not None, 'RedisBackend is not connected'  # noqa: S101
+        return self._redis
+
+    def pool_stats(self) -> Dict[str, Optional[int]]:
+        """
+        Connection counters of the pool, used to size it under load, zeros before connect().
+        aioredis has no public counters, the pool internals are read defensively.
+        """
+        if self._redis is None:
+            return {'in_use': 0, 'idle': 0, 'created': 0, 'max_connections': None}
+        pool = self._redis.connection_pool
+        in_use = len(getattr(pool, '_in_use_connections', ()))
+        idle = len(getattr(pool, '_available_connections', ()))
+        return {
+            'in_use': in_use,
+            'idle': idle,
+            'created': getattr(pool, '_created_connections', in_use + idle),
+            'max_connections': pool.max_connections,
+        }
 
     async def get(self: 'RedisBackend', key: Union[str, bytes]) -> bytes:
-        return await self._redis.get(key)
+        return await self.redis.get(key)
+
+    async def mget(self: 'RedisBackend', *keys: Union[str, bytes]) -> List[Optional[bytes]]:
+        return await self.redis.mget(*keys)
 
     async def delete(self: 'RedisBackend', key: Union[str, bytes]) -> None:
-        await self._redis.delete(key)
+        await self.redis.delete(key)
 
     async def keys(self: 'RedisBackend', match: Union[str, bytes]) -> List[bytes]:
-        return await self._redis.keys(match)
+        return await self.redis.keys(match)
 
     async def set(
         self: 'RedisBackend',
@@ -33,19 +96,161 @@ class RedisBackend:
         value: Union[str, bytes, int],
         expire: int = 0,
     ) -> None:
-        await self._redis.set(key, value, ex=expire)
+        await self.redis.set(key, value, ex=expire)
 
     async def setnx(
         self: 'RedisBackend',
         key: str,
         value: Union[str, bytes, int],
         expire: int,
-    ) -> None:
-        await self._redis.setnx(key, value)
-        await self._redis.expire(key, expire)
+    ) -> bool:
+        """Set the key with expiration only if it does not exist, return whether it was set."""
+        return bool(await self.redis.set(key, value, ex=expire, nx=True))
+
+    async def getdel(self: 'RedisBackend', key: Union[str, bytes]) -> Optional[bytes]:
+        """Atomically read and delete the key in a single round trip."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.delete(key)
+            value, _ = await pipe.execute()
+        return value
 
     async def incr(self: 'RedisBackend', key: str) -> str:
-        return await self._redis.incr(key)
+        return await self.redis.incr(key)
+
+    async def memory_usage(self: 'RedisBackend', key: Union[str, bytes]) -> Optional[int]:
+        """Bytes taken by the key and its value in Redis, None if the key does not exist."""
+        return await self.redis.memory_usage(key)
+
+    async def publish(self: 'RedisBackend', channel: str, message: Union[str, bytes]) -> int:
+        return await self.redis.publish(channel, message)
+
+    def pubsub(self: 'RedisBackend', ignore_subscribe_messages: bool = True) -> PubSub:
+        return self.redis.pubsub(ignore_subscribe_messages=ignore_subscribe_messages)
+
+    def pipeline(self: 'RedisBackend', transaction: bool = True) -> Pipeline:
+        """
+        Buffer raw aioredis commands and send them in a single round trip.
+
+        Usage:
+            async with redis.pipeline() as pipe:
+                await pipe.set('key', 'value', ex=60).expire('other', 60).execute()
+        """
+        return self.redis.pipeline(transaction=transaction)
 
     async def ping(self) -> bool:
-        return await self._redis.ping()
+        return await self.redis.ping()
+
+    async def run_script(
+        self: 'RedisBackend',
+        script: str,
+        keys: List[str],
+        args: List[Union[str, bytes, int, float]],
+    ) -> Any:  # noqa: ANN401
+        """Run a Lua script in a single round trip, loading it into Redis on first use."""
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.redis.register_script(script)
+        return await registered(keys=keys, args=args)
+
+
+class LocalCache:
+    """
+    In-process LRU cache with per entry TTL, used as a local tier in front of Redis.
+
+    None is a valid value, so negative lookups can be cached too:
+    get() returns MISSING when the key is absent or expired.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Tuple[Any, Optional[float]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:  # noqa: ANN401
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:  # noqa: ANN401
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: no false negatives, false positives at about error_rate
+    while no more than capacity items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.count >= self.capacity
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'size_bytes': len(self._bits),
+        }
+
+
+redis_backend = RedisBackend()
@@ -0,0 +1,45 @@
+import argparse
+import csv
+import sys
+from typing import Optional
+
+from commands.base import BaseCommand
+from config import settings
+
+from api.v1.users.repositories import UserRepository
+from api.v1.users.schemas import User
+
+
+class ExportUsers(BaseCommand):
+    command_name = 'export-users'
+    help_text = 'Export users to a CSV file, streamed with a server-side cursor.'
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            '-o',
+            '--output',
+            type=str,
+            help='Path of the CSV file, stdout by default.',
+            default=None,
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Number of rows fetched per round trip.',
+            default=settings.DB_ITERATE_CHUNK_SIZE,
+        )
+
+    @classmethod
+    async def run(cls, args: Optional[argparse.Namespace] = None) -> None:
+        fields = list(User.__fields__)
+        output = open(args.output, 'w', newline='') if args.output else sys.stdout  # noqa: SIM115
+        try:
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            query = UserRepository.all(schema=User).order_by('created_at')
+            async for users in query.chunks(args.chunk_size, schema=User):
+                writer.writerows(user.dict() for user in users)
+        finally:
+            if output is not sys.stdout:
+                output.close()
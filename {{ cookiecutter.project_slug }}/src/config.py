@@ -47,13 +47,17 @@ class EnvSettings(BaseSettings):
     # Authorization configuration.
     SECRET_KEY: str = ''
     OTP_RATE_LIMIT: int = 3
+    OTP_RATE_PERIOD: int = 60  # 1 minute
+    OTP_BLOCK_TIMEOUT: int = 60 * 5  # 5 minutes
     OTP_EXPIRE: int = 60 * 5  # 5 minutes
     AUTH_JWT_ALGORITHM: str = 'HS256'
+    AUTH_JWT_COMPACT_CLAIMS: bool = False  # Access tokens carry only sub, the user is read from a cached profile
     AUTH_JWT_ACCESS_TOKEN_EXP_DELTA_MINUTES: int = 60 * 24 * 2  # 60 * 24 * 2  # 60 minutes * 24 hours * 2 days = 2 days
     JWT_REFRESH_TOKEN_EXP_DELTA_MINUTES: int = 60 * 24 * 14  # 60 minutes * 24 hours * 14 days = 2 week
 
     # API configuration.
     DEFAULT_DATETIME_FORMAT: str = '%Y-%m-%dT%H:%M:%S%z'
+    RESPONSE_VALIDATION: bool = False  # Validate bodies against response_model, a development check
 
     # Database configuration.
     POSTGRES_USER: str = 'postgres'
@@ -62,6 +66,20 @@ class EnvSettings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = 'app'
     DB_URI: Optional[str] = None
+    DB_COMPILED_CACHE_SIZE: int = 1000  # Compiled statements kept per worker, one per query shape
+    DB_ITERATE_CHUNK_SIZE: int = 1000  # Rows fetched per round trip by server-side cursors
+    DB_COPY_THRESHOLD: int = 1000  # Bulk inserts of at least this many rows use COPY
+    DB_BULK_CHUNK_SIZE: int = 5000  # Rows per statement of bulk updates and deletes
+    DB_POOL_MIN_SIZE: int = 10
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_MAX_QUERIES: int = 50000  # Queries served by a connection before it is replaced
+    DB_POOL_MAX_INACTIVE_LIFETIME: float = 300  # seconds, idle connections above the min size are closed
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements per connection, 0 behind pgbouncer in transaction mode
+    DB_REPLICA_URIS: List[str] = []  # Read replicas, SELECTs outside of transactions are routed to them
+    DB_REPLICA_ROUTING: str = 'round_robin'  # round_robin or least_connections
+    DB_REPLICA_MAX_LAG: float = 5  # seconds, a replica lagging more is out of rotation
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5  # seconds
+    DB_REPLICA_READ_YOUR_WRITES: float = 5  # seconds the task reads from the primary after a write
 
     @validator('POSTGRES_DB', pre=True)
     def get_actual_db_name(cls, v: str, values: Dict[str, Any]) -> str:  # noqa: RSPEC-5720
@@ -92,11 +110,28 @@ class EnvSettings(BaseSettings):
             ),
         )
 
+    # Pagination configuration.
+    PAGINATION_ESTIMATE_THRESHOLD: int = 100000  # Below this planner estimate rows are counted exactly
+    # Exact count and page on two pooled connections instead of one, for slow counts on a roomy pool
+    PAGINATION_CONCURRENT_COUNT: bool = False
+
     # Redis configuration.
     REDIS_HOST: Optional[str] = None
     REDIS_PORT: int = 6379
     REDIS_DB: str = '1'
     REDIS_URI: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: Optional[float] = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT: Optional[float] = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds
+
+    # In-process cache configuration.
+    LOCAL_CACHE_MAX_SIZE: int = 10000
+    LOCAL_CACHE_TTL: int = 60  # seconds
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_RESYNC_INTERVAL: int = 60  # seconds
+    QUERY_CACHE_TTL: int = 60  # seconds
 
     @validator('REDIS_URI', pre=True)
     def assemble_redis_uri(
@@ -167,5 +202,24 @@ class Settings(HardSettings, EnvSettings):
     def openapi_url(self) -> str:
         return self.URL_SUBPATH + self.SWAGGER_URL + 'openapi.json'
 
+    @property
+    def db_pool_options(self) -> Dict[str, Any]:
+        return {
+            'min_size': self.DB_POOL_MIN_SIZE,
+            'max_size': self.DB_POOL_MAX_SIZE,
+            'max_queries': self.DB_POOL_MAX_QUERIES,
+            'max_inactive_connection_lifetime': self.DB_POOL_MAX_INACTIVE_LIFETIME,
+            'statement_cache_size': self.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    @property
+    def redis_pool_options(self) -> Dict[str, Any]:
+        return {
+            'max_connections': self.REDIS_MAX_CONNECTIONS,
+            'socket_timeout': self.REDIS_SOCKET_TIMEOUT,
+            'socket_connect_timeout': self.REDIS_SOCKET_CONNECT_TIMEOUT,
+            'health_check_interval': self.REDIS_HEALTH_CHECK_INTERVAL,
+        }
+
 
 settings = Settings()
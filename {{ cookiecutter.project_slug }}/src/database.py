@@ -1,17 +1,432 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import TypeVar
+from typing import Union
 
+import asyncpg
 import databases
+from cache import MISSING
+from cache import LocalCache
 from config import settings
+from databases.backends import postgres
+from databases.core import LOG_EXTRA
 from sqlalchemy import MetaData
+from sqlalchemy import text
+from sqlalchemy.engine.interfaces import Dialect
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.ddl import DDLElement
+from sqlalchemy.sql.dml import UpdateBase
 
 __all__ = ('database', 'metadata', 'Base')
 
-database: databases.core.Database
+logger = logging.getLogger('databases')
+
+# Errors of an unreachable replica, the read is retried on the primary
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError)
+
+# Replay lag in seconds, 0 when everything received is replayed: an idle primary does not make the replica lag
+LAG_QUERY = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END',
+)
+
+_last_write: ContextVar[Optional[float]] = ContextVar('last_write', default=None)
+
+
+def is_read(query: Union[ClauseElement, str]) -> bool:
+    """SELECT without a row lock, raw SQL is never routed to a replica."""
+    return getattr(query, 'is_select', False) and getattr(query, '_for_update_arg', None) is None
+
+
+class ReplicaRouting(str, Enum):
+    ROUND_ROBIN = 'round_robin'
+    LEAST_CONNECTIONS = 'least_connections'
+
+
+class PoolMetrics:
+    """
+    Checkout counters of a connection pool. Waiting tasks and acquire latency are the first to grow
+    when the pool is saturated, percentiles are taken over the last `window` acquires.
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent: 'deque[float]' = deque(maxlen=window)
+
+    @contextlib.contextmanager
+    def measure_acquire(self) -> Iterator[None]:
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - start
+        self.acquired += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._recent.append(wait)
+
+    def get_percentile(self, percent: int) -> float:
+        if not self._recent:
+            return 0.0
+        recent = sorted(self._recent)
+        return recent[(len(recent) - 1) * percent // 100]
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            'waiting': self.waiting,
+            'acquired': self.acquired,
+            'acquire_avg_ms': self.wait_total / self.acquired * 1000 if self.acquired else 0.0,
+            'acquire_p95_ms': self.get_percentile(95) * 1000,
+            'acquire_max_ms': self.wait_max * 1000,
+        }
+
+
+class PostgresConnection(postgres.PostgresConnection):
+    """
+    Reuses compiled SQL for statements of the same shape.
+
+    SQLAlchemy cache key covers the entities, columns, clause structure and operators, but not the bound values,
+    so a repeated repository call skips the compiler and only extracts fresh parameters from the statement.
+    """
+
+    compiled_cache = LocalCache(max_size=settings.DB_COMPILED_CACHE_SIZE)
+
+    def _compile(self, query: ClauseElement) -> Tuple[str, list, Optional[tuple]]:
+        if isinstance(query, DDLElement) or getattr(query, '_multi_values', None):
+            # Multi-row VALUES have a shape per number of rows, too large and too varied to keep
+            return super()._compile(query)
+
+        cache_key = query._generate_cache_key()
+        if cache_key is None:
+            return super()._compile(query)
+
+        entry = self.compiled_cache.get(cache_key.key)
+        if entry is MISSING:
+            compiled = query.compile(dialect=self._dialect, cache_key=cache_key)
+            names = sorted(compiled.params)
+            compiled_query = compiled.string % {name: f'${i}' for i, name in enumerate(names, start=1)}
+            entry = (compiled, compiled_query, names, compiled._result_columns)
+            self.compiled_cache.set(cache_key.key, entry)
+            params = compiled.params
+        else:
+            compiled, compiled_query, names, _ = entry
+            params = compiled.construct_params(extracted_parameters=cache_key[1])
+
+        processors = compiled._bind_processors
+        if compiled.post_compile_params or compiled.literal_execute_params:
+            # Expanding IN parameters render a different SQL for every number of values,
+            # the cached statement is expanded for the current ones like SQLAlchemy does on execution.
+            # The values of the expanding parameters in params are replaced with one parameter per value.
+            expanded = compiled._process_parameters_for_postcompile(params)
+            processors = {**processors, **expanded.processors}
+            names = sorted(params)
+            compiled_query = expanded.statement % {name: f'${i}' for i, name in enumerate(names, start=1)}
+        args = [processors[name](params[name]) if name in processors else params[name] for name in names]
+        if logger.isEnabledFor(logging.DEBUG):
+            query_message = compiled_query.replace(' \n', ' ').replace('\n', ' ')
+            logger.debug('Query: %s Args: %s', query_message, repr(tuple(args)), extra=LOG_EXTRA)
+        return compiled_query, args, entry[3]
+
+    async def acquire(self) -> None:
+        with self._database.pool_metrics.measure_acquire():
+            await super().acquire()
+
+    async def iterate_chunks(self, query: ClauseElement, chunk_size: int) -> AsyncIterator[List[postgres.Record]]:
+        """Rows of a server-side cursor, fetched chunk_size at a time. Must run inside a transaction."""
+        assert self._connection is not None, 'Connection is not acquired'
+        query_str, args, result_columns = self._compile(query)
+        column_maps = self._create_column_maps(result_columns)
+        cursor = await self._connection.cursor(query_str, *args)
+        while True:
+            rows = await cursor.fetch(chunk_size)
+            if not rows:
+                return
+            yield [postgres.Record(row, result_columns, self._dialect, column_maps) for row in rows]
+
+    @classmethod
+    def compiled_cache_stats(cls) -> Dict[str, Any]:
+        return cls.compiled_cache.stats()
+
+
+class PostgresBackend(postgres.PostgresBackend):
+    def __init__(self, database_url: Union[databases.DatabaseURL, str], **options) -> None:
+        super().__init__(database_url, **options)
+        self.pool_metrics = PoolMetrics()
+
+    def connection(self) -> PostgresConnection:
+        return PostgresConnection(self, self._dialect)
+
+    def pool_stats(self) -> Dict[str, Union[int, float]]:
+        """Connection counters of the pool and its checkout latency, used to size it under load."""
+        pool = self._pool
+        stats: Dict[str, Union[int, float]] = {}
+        if pool is not None:
+            stats = {
+                'size': pool.get_size(),
+                'idle': pool.get_idle_size(),
+                'in_use': pool.get_size() - pool.get_idle_size(),
+                'min_size': pool.get_min_size(),
+                'max_size': pool.get_max_size(),
+            }
+        return {**stats, **self.pool_metrics.stats()}
+
+
+class Transaction(databases.core.Transaction):
+    """Transaction running callbacks once it is committed, e.g. to invalidate caches of the rows it wrote."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.commit_callbacks: List[Callable[[], Awaitable[Any]]] = []
+
+    async def commit(self) -> None:
+        await super().commit()
+        callbacks, self.commit_callbacks = self.commit_callbacks, []
+        for callback in callbacks:
+            await callback()
+
+
+class Database(databases.Database):
+    """
+    Primary database with optional read replicas.
+
+    SELECTs outside of a transaction run on a replica in rotation, everything else on the primary.
+    After a write the task reads from the primary for DB_REPLICA_READ_YOUR_WRITES seconds, so a request
+    sees its own changes. Replicas lagging more than DB_REPLICA_MAX_LAG seconds, or unreachable,
+    are out of rotation until the next lag check.
+    """
+
+    SUPPORTED_BACKENDS = {
+        **databases.Database.SUPPORTED_BACKENDS,
+        'postgresql': 'database:PostgresBackend',
+        'postgres': 'database:PostgresBackend',
+    }
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        force_rollback: bool = False,
+        replica_urls: Sequence[str] = (),
+        routing: ReplicaRouting = ReplicaRouting.ROUND_ROBIN,
+        **options,
+    ) -> None:
+        super().__init__(url, force_rollback=force_rollback, **options)
+        self.replicas = [Replica(replica_url, **options) for replica_url in replica_urls]
+        self.routing = routing
+        self._turns = itertools.count()
+        self._lag_monitor: Optional[asyncio.Task] = None
+
+    @property
+    def dialect(self) -> Dialect:
+        return self._backend._dialect
+
+    async def connect(self) -> None:
+        await super().connect()
+        if self.replicas:
+            await self.check_replicas()
+            self._lag_monitor = asyncio.create_task(self._monitor_replicas())
+
+    async def disconnect(self) -> None:
+        if self._lag_monitor is not None:
+            self._lag_monitor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._lag_monitor
+            self._lag_monitor = None
+        for replica in self.replicas:
+            if replica.is_connected:
+                await replica.disconnect()
+        await super().disconnect()
+
+    def pool_stats(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """Pool counters of the primary and of every replica, keyed by the URL without the password."""
+        return {
+            'primary': self._backend.pool_stats(),
+            **{replica.url.obscure_password: replica._backend.pool_stats() for replica in self.replicas},
+        }
+
+    async def check_replicas(self) -> None:
+        await asyncio.gather(*[replica.check_lag() for replica in self.replicas])
+
+    async def _monitor_replicas(self) -> None:
+        while True:
+            await asyncio.sleep(settings.DB_REPLICA_LAG_CHECK_INTERVAL)
+            await self.check_replicas()
+
+    def mark_write(self) -> None:
+        """Pin the reads of the current task to the primary for the read-your-writes window."""
+        if self.replicas:
+            _last_write.set(time.monotonic())
+
+    def has_recent_write(self) -> bool:
+        last_write = _last_write.get()
+        return last_write is not None and time.monotonic() - last_write < settings.DB_REPLICA_READ_YOUR_WRITES
+
+    def get_reader(self) -> 'Database':
+        """Database to read from: a replica in rotation, or the primary in a transaction and after a recent write."""
+        if not self.replicas or self.in_transaction() or self.has_recent_write():
+            return self
+        available = [replica for replica in self.replicas if replica.is_available]
+        if not available:
+            return self
+        if self.routing == ReplicaRouting.LEAST_CONNECTIONS:
+            return min(available, key=lambda replica: replica.connections_in_use)
+        return available[next(self._turns) % len(available)]
+
+    async def _route(self, method: str, query: Union[ClauseElement, str], *args: Any) -> Any:  # noqa: ANN401
+        if is_read(query):
+            reader = self.get_reader()
+            if reader is not self:
+                try:
+                    return await getattr(reader, method)(query, *args)
+                except REPLICA_ERRORS as e:
+                    reader.mark_unavailable(e)
+        elif isinstance(query, UpdateBase):
+            self.mark_write()
+        return await getattr(super(), method)(query, *args)
+
+    async def fetch_all(
+        self,
+        query: Union[ClauseElement, str],
+        values: Optional[dict] = None,
+    ) -> List[postgres.Record]:
+        return await self._route('fetch_all', query, values)
+
+    async def fetch_one(
+        self,
+        query: Union[ClauseElement, str],
+        values: Optional[dict] = None,
+    ) -> Optional[postgres.Record]:
+        return await self._route('fetch_one', query, values)
+
+    async def fetch_val(
+        self,
+        query: Union[ClauseElement, str],
+        values: Optional[dict] = None,
+        column: Any = 0,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        return await self._route('fetch_val', query, values, column)
+
+    async def execute(self, query: Union[ClauseElement, str], values: Optional[dict] = None) -> Any:  # noqa: ANN401
+        return await self._route('execute', query, values)
+
+    async def execute_many(self, query: Union[ClauseElement, str], values: list) -> None:
+        if isinstance(query, UpdateBase):
+            self.mark_write()
+        await super().execute_many(query, values)
+
+    def transaction(self, *, force_rollback: bool = False, **kwargs) -> Transaction:
+        return Transaction(self.connection, force_rollback=force_rollback, **kwargs)
+
+    async def on_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Run the callback once the outermost transaction of the current task commits, it is dropped on a rollback.
+        Outside of a transaction, or in one not started by transaction(), it is run right away.
+        """
+        connection = self._global_connection or self._connection_context.get(None)
+        if connection is not None and connection._transaction_stack:
+            outermost = connection._transaction_stack[0]
+            if isinstance(outermost, Transaction):
+                outermost.commit_callbacks.append(callback)
+                return
+        await callback()
+
+    def in_transaction(self) -> bool:
+        """Whether the current task runs in a transaction, including the force_rollback one of the tests."""
+        if self._global_connection is not None:
+            return True
+        connection = self._connection_context.get(None)
+        return connection is not None and bool(connection._transaction_stack)
+
+    def isolated_connection(self) -> databases.core.Connection:
+        """
+        Separate pooled connection, unlike connection() it is not shared with the current task,
+        so queries on several of them run concurrently.
+        """
+        return databases.core.Connection(self._backend)
+
+    async def iterate_chunks(self, query: ClauseElement, chunk_size: int) -> AsyncIterator[List[postgres.Record]]:
+        """
+        Stream the result in chunks from a server-side cursor, so memory does not grow with the result size.
+
+        The cursor runs on a separate connection in its own transaction, the loop body is free
+        to run other queries. Inside a transaction the cursor uses its connection to see its changes.
+        """
+        reader = self.get_reader() if is_read(query) else self
+        connection = self.connection() if self.in_transaction() else reader.isolated_connection()
+        async with connection, connection.transaction():
+            chunks = connection._connection.iterate_chunks(connection._build_query(query), chunk_size)
+            while True:
+                async with connection._query_lock:
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield chunk
+
+
+class Replica(Database):
+    """Read-only standby of the primary, in rotation while it is reachable and its lag is acceptable."""
+
+    def __init__(self, url: str, **options) -> None:
+        super().__init__(url, **options)
+        self.lag: Optional[float] = None
+        self.is_available = False
+
+    @property
+    def connections_in_use(self) -> int:
+        pool = self._backend._pool
+        return pool.get_size() - pool.get_idle_size() if pool is not None else 0
+
+    async def check_lag(self) -> None:
+        try:
+            if not self.is_connected:
+                await self.connect()
+            self.lag = float(await self.fetch_val(LAG_QUERY))
+        except REPLICA_ERRORS as e:
+            self.mark_unavailable(e)
+            return
+        self.is_available = self.lag <= settings.DB_REPLICA_MAX_LAG
+        if not self.is_available:
+            logger.warning('Replica %s lags %.1f seconds, out of rotation', self.url.obscure_password, self.lag)
+
+    def mark_unavailable(self, error: Exception) -> None:
+        self.lag = None
+        self.is_available = False
+        logger.warning('Replica %s is unavailable, out of rotation: %r', self.url.obscure_password, error)
+
+
+database: Database
 if settings.TESTING:
-    database = databases.Database(str(settings.DB_URI), force_rollback=True)
+    database = Database(str(settings.DB_URI), force_rollback=True, **settings.db_pool_options)
 else:
-    database = databases.Database(str(settings.DB_URI))
+    database = Database(
+        str(settings.DB_URI),
+        replica_urls=settings.DB_REPLICA_URIS,
+        routing=ReplicaRouting(settings.DB_REPLICA_ROUTING),
+        **settings.db_pool_options,
+    )
 
 meta = MetaData(
     naming_convention={
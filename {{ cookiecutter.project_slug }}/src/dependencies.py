@@ -1,20 +1,23 @@
-from typing import AsyncGenerator
+from typing import Callable
 from typing import Optional
-from typing import Union
 
 import sentry_sdk
 from cache import RedisBackend
-from config import settings
+from cache import redis_backend
 from database import database  # type: ignore
 from databases.core import Transaction
 from fastapi import Depends
 from fastapi import Header
 from fastapi import Request
 from fastapi.security import OAuth2AuthorizationCodeBearer
+from rate_limit import RateLimitAlgorithm
+from rate_limit import RateLimiter
 
+from api.v1.auth.services import RevocationService
+from api.v1.auth.services import SessionService
 from api.v1.auth.services import TokenService
 from api.v1.users.schemas import User
-from sdk.exceptions.exceptions import make_error
+from sdk.exceptions.catalogue import error_catalogue
 from sdk.responses import ResponseStatus
 from sdk.schemas import TrackingSchemaMixin
 
@@ -22,14 +25,11 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl='login',
     tokenUrl='login',
 )
+not_authenticated = error_catalogue.register(ResponseStatus.UNAUTHORIZED, 'Not authenticated')
 
 
-async def cache_storage() -> Union[RedisBackend, AsyncGenerator]:
-    pool = await RedisBackend.create_pool(settings.REDIS_URI)
-    try:
-        yield pool
-    finally:
-        await pool.close()
+async def cache_storage() -> RedisBackend:
+    return redis_backend
 
 
 async def get_tracking_data(
@@ -42,6 +42,33 @@ async def get_tracking_data(
     )
 
 
+def rate_limit(
+    name: str,
+    limit: int,
+    period: int,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+    block: int = 0,
+    message: str = 'Too many requests',
+) -> Callable:
+    """
+    Per-route rate limit by client IP.
+
+    Usage: @router.post('/login', dependencies=[Depends(rate_limit('login', 3, 60))])
+    """
+    limiter = RateLimiter(name, limit, period, algorithm=algorithm, block=block)
+    too_many_requests = error_catalogue.register(ResponseStatus.TOO_MANY_REQUESTS, message)
+
+    async def check_rate_limit(
+        tracking_params: TrackingSchemaMixin = Depends(get_tracking_data),
+        redis: RedisBackend = Depends(cache_storage),
+    ) -> None:
+        allowed, _ = await limiter.hit(redis, tracking_params.ip_address)
+        if not allowed:
+            raise too_many_requests()
+
+    return check_rate_limit
+
+
 def get_transaction() -> Transaction:
     return database.transaction()
 
@@ -56,16 +83,15 @@ async def get_authenticated_user(
     token: str = Depends(get_access_token),
     redis: RedisBackend = Depends(cache_storage),
 ) -> User:
-    auth_error = make_error(
-        custom_code=ResponseStatus.UNAUTHORIZED,
-        message='Not authenticated',
-    )
-    user = TokenService.get_payload(token)
+    digest = TokenService.get_digest(token)
+    payload = TokenService.get_payload(token, digest)
+    if payload is None:
+        raise not_authenticated()
+    if await RevocationService.is_revoked(redis, payload):
+        raise not_authenticated()
+    user = await SessionService.get_user(token, redis, digest)
     if user is None:
-        raise auth_error
-    in_blacklist = await redis.get(f'bl:{token}')
-    if in_blacklist:
-        raise auth_error
+        raise not_authenticated()
     with sentry_sdk.configure_scope() as scope:
-        scope.set_user(user['data'])
-    return User(**user['data'])
+        scope.set_user(payload.get('data', {'id': payload['sub']}))
+    return user
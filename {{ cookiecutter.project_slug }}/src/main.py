@@ -2,6 +2,7 @@ import time
 from typing import Callable
 
 import uvicorn
+from cache import redis_backend
 from config import settings
 from database import database  # type: ignore
 from fastapi import FastAPI
@@ -12,7 +13,9 @@ from sentry import init_sentry
 from starlette.middleware.cors import CORSMiddleware
 
 from api.router import api_router
+from api.v1.auth.services import RevocationService
 from sdk.exceptions.exception_handler_mapping import exception_handler_mapping
+from sdk.loaders import loader_scope
 from sdk.utils import fake_http_bearer
 
 app = FastAPI(
@@ -45,17 +48,23 @@ if settings.BACKEND_CORS_ORIGINS:
 @app.on_event('startup')
 async def startup() -> None:
     await database.connect()
+    if settings.REDIS_URI:
+        await redis_backend.connect(settings.REDIS_URI, **settings.redis_pool_options)
+        await RevocationService.start(redis_backend)
 
 
 @app.on_event('shutdown')
 async def shutdown() -> None:
     await database.disconnect()
+    await RevocationService.stop()
+    await redis_backend.close()
 
 
 @app.middleware('http')
 async def add_process_time_header(request: Request, call_next: Callable) -> Response:
     start_time = time.time()
-    response = await call_next(request)
+    with loader_scope():
+        response = await call_next(request)
     process_time = time.time() - start_time
     response.headers['X-Process-Time'] = str(process_time)
     return response
@@ -0,0 +1,137 @@
+import math
+import uuid
+from enum import Enum
+from typing import Tuple
+
+from cache import RedisBackend
+
+# Every script takes KEYS[1] = state key, KEYS[2] = block key and
+# ARGV[1] = limit, ARGV[2] = period (ms), ARGV[3] = block (ms).
+# It returns {allowed, retry_after_ms} and decides in a single round trip.
+
+_BLOCK_CHECK = """
+local blocked = redis.call('PTTL', KEYS[2])
+if blocked > 0 then
+    return {0, blocked}
+end
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local block = tonumber(ARGV[3])
+local function deny(retry_after)
+    if block > 0 then
+        redis.call('SET', KEYS[2], 1, 'PX', block)
+        return {0, block}
+    end
+    return {0, math.ceil(retry_after)}
+end
+"""
+
+_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+"""
+
+FIXED_WINDOW_SCRIPT = (
+    _BLOCK_CHECK
+    + """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], period)
+end
+if count > limit then
+    return deny(redis.call('PTTL', KEYS[1]))
+end
+return {1, 0}
+"""
+)
+
+SLIDING_WINDOW_SCRIPT = (
+    _BLOCK_CHECK
+    + _NOW
+    + """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - period)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return deny(tonumber(oldest[2]) + period - now)
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], period)
+return {1, 0}
+"""
+)
+
+GCRA_SCRIPT = (
+    _BLOCK_CHECK
+    + _NOW
+    + """
+local emission_interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+tat = math.max(tat, now)
+local new_tat = tat + emission_interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return deny(allow_at - now)
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
+)
+
+
+class RateLimitAlgorithm(str, Enum):
+    FIXED_WINDOW = 'fixed_window'
+    SLIDING_WINDOW = 'sliding_window'
+    GCRA = 'gcra'  # token bucket with a burst of `limit` requests
+
+
+class RateLimiter:
+    """
+    Atomic rate limiter, backed by Lua scripts executed on the Redis side.
+
+    limit is the number of requests allowed per period (seconds).
+    block is an optional penalty (seconds) applied once the limit is exceeded.
+    """
+
+    scripts = {
+        RateLimitAlgorithm.FIXED_WINDOW: FIXED_WINDOW_SCRIPT,
+        RateLimitAlgorithm.SLIDING_WINDOW: SLIDING_WINDOW_SCRIPT,
+        RateLimitAlgorithm.GCRA: GCRA_SCRIPT,
+    }
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        period: int,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+        block: int = 0,
+    ) -> None:
+        if limit < 1 or period < 1:
+            raise ValueError('limit and period must be greater than 0')
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+        self.block = block
+
+    def get_keys(self, identifier: str) -> Tuple[str, str]:
+        return (
+            f'rl:{self.name}:{self.algorithm.value}:{identifier}',
+            f'rl:{self.name}:block:{identifier}',
+        )
+
+    async def hit(self, redis: RedisBackend, identifier: str) -> Tuple[bool, int]:
+        """
+        Register a request of the identifier.
+
+        :return: whether the request is allowed and seconds to wait otherwise
+        """
+        args = [self.limit, self.period * 1000, self.block * 1000]
+        if self.algorithm == RateLimitAlgorithm.SLIDING_WINDOW:
+            args.append(uuid.uuid4().hex)
+        allowed, retry_after = await redis.run_script(
+            self.scripts[self.algorithm],
+            keys=list(self.get_keys(identifier)),
+            args=args,
+        )
+        return bool(allowed), math.ceil(int(retry_after) / 1000)
@@ -0,0 +1,51 @@
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+from sdk.exceptions.exceptions import AppException
+from sdk.responses import DefaultResponse
+from sdk.responses import FieldErrorSchema
+from sdk.responses import ResponseStatus
+
+
+class ErrorCatalogue:
+    """
+    Bodies of constant errors, rendered once when they are registered on import.
+
+    The exceptions raised by a registered factory carry the key of their body, the exception handlers
+    send it as is, so a flood of failed logins or invalid tokens does not render the same envelope
+    over and over. Errors that were not registered, e.g. with a message or details built per request,
+    are rendered as usual.
+    """
+
+    def __init__(self) -> None:
+        self._bodies: Dict[Hashable, bytes] = {}
+
+    @staticmethod
+    def get_key(custom_code: int, message: Optional[str], details: Dict[str, str]) -> Tuple[Any, ...]:
+        """Key of an error, (custom_code, message) without details, the key of FastAPI's HTTPException."""
+        return (custom_code, message, *details.items())
+
+    def register(self, custom_code: ResponseStatus, message: str, **details) -> Callable[[], AppException]:
+        """
+        Render the error of make_error(custom_code, message, **details).
+
+        :return: factory of the exception, raise a new one every time as a raised exception keeps its traceback
+        """
+        field_errors = [FieldErrorSchema(field=field, message=details[field]) for field in details]
+        key = self.get_key(custom_code, message, details)
+        self._bodies[key] = DefaultResponse(custom_code=custom_code, message=message, details=field_errors).body
+
+        def factory() -> AppException:
+            return AppException(custom_code, message, list(field_errors), catalogue_key=key)
+
+        return factory
+
+    def get(self, key: Optional[Hashable]) -> Optional[bytes]:
+        return self._bodies.get(key) if key is not None else None
+
+
+error_catalogue = ErrorCatalogue()
@@ -1,3 +1,4 @@
+from typing import Hashable
 from typing import Optional
 
 from httpx import Response
@@ -15,16 +16,19 @@ class AppException(Exception):
     app_code: ResponseStatus
     message: Optional[str]
     field_errors: Optional[FieldErrorsSchema]
+    catalogue_key: Optional[Hashable]
 
     def __init__(
         self,
         custom_code: ResponseStatus,
         message: Optional[str] = None,
         field_errors: FieldErrorsSchema = None,
+        catalogue_key: Optional[Hashable] = None,
     ) -> None:
         self.message = message
         self.custom_code = custom_code
         self.field_errors = field_errors
+        self.catalogue_key = catalogue_key  # Key of the pre-rendered body in the error catalogue
 
 
 class ExternalServiceError(Exception):
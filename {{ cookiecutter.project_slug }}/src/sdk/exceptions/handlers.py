@@ -7,7 +7,9 @@ from fastapi.exceptions import HTTPException
 from fastapi.exceptions import RequestValidationError
 from starlette import status
 from starlette.requests import Request
+from starlette.responses import Response
 
+from sdk.exceptions.catalogue import error_catalogue
 from sdk.exceptions.exceptions import AppException
 from sdk.exceptions.exceptions import ExternalServiceError
 from sdk.responses import DefaultResponse
@@ -61,20 +63,29 @@ def unexpected_exception_handler(request: Request, exc: Exception) -> DefaultRes
     )
 
 
-def fastapi_exception_error_handler(request: Request, exc: HTTPException) -> DefaultResponse:
+def fastapi_exception_error_handler(request: Request, exc: HTTPException) -> Response:
     """Обработчик ошибок FastAPI"""
 
+    custom_code = ResponseStatus.from_status_code(exc.status_code)
+    body = error_catalogue.get((custom_code, exc.detail) if isinstance(exc.detail, str) else None)
+    if body is not None:
+        return Response(body, status_code=status.HTTP_400_BAD_REQUEST, media_type=DefaultResponse.media_type)
+
     return DefaultResponse(
-        custom_code=ResponseStatus.from_status_code(exc.status_code),
+        custom_code=custom_code,
         message=exc.detail,
         details=[],
         status_code=status.HTTP_400_BAD_REQUEST,
     )
 
 
-def app_exception_handler(request: Request, exc: AppException) -> DefaultResponse:
+def app_exception_handler(request: Request, exc: AppException) -> Response:
     """Обработчик ошибок приложения"""
 
+    body = error_catalogue.get(exc.catalogue_key)
+    if body is not None:
+        return Response(body, status_code=status.HTTP_400_BAD_REQUEST, media_type=DefaultResponse.media_type)
+
     return DefaultResponse(
         custom_code=exc.custom_code,
         message=exc.message,
@@ -0,0 +1,22 @@
+from typing import Any
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.expression import ClauseElement
+from sqlalchemy.sql.expression import Executable
+from sqlalchemy.sql.visitors import InternalTraversal
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, the plan is in the "QUERY PLAN" column of the row."""
+
+    inherit_cache = True
+    _traverse_internals = [('statement', InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, statement: ClauseElement) -> None:
+        self.statement = statement
+
+
+@compiles(Explain, 'postgresql')
+def visit_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:  # noqa: ANN401
+    return 'EXPLAIN (FORMAT JSON) ' + compiler.process(element.statement, **kw)
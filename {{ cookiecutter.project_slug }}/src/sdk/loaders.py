@@ -0,0 +1,108 @@
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+BatchLoad = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class DataLoader:
+    """
+    Collects the keys loaded in one event loop tick into a single batch_load call and memoizes the results.
+
+    batch_load receives at most max_batch_size keys and returns a mapping of the found keys,
+    a key missing from it loads as None. A failed batch is not memoized, so the next load retries it.
+    """
+
+    def __init__(self, batch_load: BatchLoad, max_batch_size: int) -> None:
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._memo: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Tuple[Hashable, asyncio.Future]] = []
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:  # noqa: ANN401
+        future = self._memo.get(key)
+        if future is None:
+            loop = asyncio.get_event_loop()
+            future = self._memo[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append((key, future))
+        # The future is shared by every caller of the key, a cancelled caller must not cancel it
+        return await asyncio.shield(future)
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._memo.clear()
+        else:
+            self._memo.pop(key, None)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.ensure_future(self._load_batch(queue[start:start + self.max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: List[Tuple[Hashable, asyncio.Future]]) -> None:
+        try:
+            values = await self.batch_load([key for key, _ in batch])
+        except BaseException as e:
+            self._fail_batch(batch, e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for key, future in batch:
+                if not future.done():
+                    future.set_result(values.get(key))
+
+    def _fail_batch(self, batch: List[Tuple[Hashable, asyncio.Future]], error: BaseException) -> None:
+        """Forget the keys of the batch and pass the error to their callers, a cancelled batch cancels them."""
+        for key, future in batch:
+            if self._memo.get(key) is future:
+                del self._memo[key]
+            if future.done():
+                continue
+            if isinstance(error, Exception):
+                future.set_exception(error)
+            else:
+                future.cancel()
+
+
+_loaders: ContextVar[Optional[Dict[Hashable, DataLoader]]] = ContextVar('loaders', default=None)
+
+
+@contextlib.contextmanager
+def loader_scope() -> Iterator[None]:
+    """Scope of the memoized loads, a request or a command. Outside of it loads are neither batched nor memoized."""
+    token = _loaders.set({})
+    try:
+        yield
+    finally:
+        _loaders.reset(token)
+
+
+def get_loader(name: Hashable, batch_load: BatchLoad, max_batch_size: int) -> DataLoader:
+    loaders = _loaders.get()
+    if loaders is None:
+        return DataLoader(batch_load, max_batch_size)
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = DataLoader(batch_load, max_batch_size)
+    return loader
+
+
+def clear_loader(name: Hashable) -> None:
+    loaders = _loaders.get()
+    if loaders is not None and name in loaders:
+        loaders[name].clear()
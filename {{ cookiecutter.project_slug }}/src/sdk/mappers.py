@@ -0,0 +1,86 @@
+import functools
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+from typing import Type
+
+from pydantic import BaseModel
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+from pydantic.fields import SHAPE_SINGLETON
+from pydantic.fields import ModelField
+
+RowMapper = Callable[[Mapping[str, Any]], BaseModel]
+
+object_new = object.__new__
+object_setattr = object.__setattr__
+
+
+def get_trusted_type(field: ModelField) -> Optional[type]:
+    """
+    Type of the values taken as is for the field: the annotation of a plain field without validators.
+    Values of other types, and values of fields with validators or complex annotations, are validated.
+    """
+    if field.class_validators or field.sub_fields or field.shape != SHAPE_SINGLETON:
+        return None
+    return field.type_ if isinstance(field.type_, type) else None
+
+
+def validate_field(
+    schema: Type[BaseModel],
+    field: ModelField,
+    value: Any,  # noqa: ANN401
+    values: Dict[str, Any],
+) -> Any:  # noqa: ANN401
+    value, errors = field.validate(value, values, loc=field.name, cls=schema)
+    if errors:
+        raise ValidationError([errors], schema)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def get_row_mapper(schema: Type[BaseModel]) -> RowMapper:
+    """
+    Build instances of the schema from rows of the database, without validating the values the driver has typed.
+
+    A row value is taken as is, like construct() does, when it is an instance of the field annotation.
+    Values of another type, e.g. the string of a UUID column read with as_uuid=False, and fields with validators
+    are validated. Computed fields declared in the schema Config are validated too, in field order,
+    so their validators see the values of the preceding fields.
+    Root validators are not run. Rows may be dicts or driver records, extra columns are ignored.
+    """
+    computed = getattr(schema.__config__, 'computed_fields', {})
+    plan = [
+        (name, field.alias, field, name in computed, get_trusted_type(field))
+        for name, field in schema.__fields__.items()
+    ]
+
+    def map_row(row: Mapping[str, Any]) -> BaseModel:
+        values: Dict[str, Any] = {}
+        fields_set = set()
+        for name, alias, field, is_computed, trusted_type in plan:
+            if is_computed:
+                values[name] = validate_field(schema, field, None, values)
+                continue
+            try:
+                value = row[alias]
+            except KeyError:
+                if field.required:
+                    raise ValidationError([ErrorWrapper(MissingError(), loc=name)], schema)
+                values[name] = field.get_default()
+                continue
+            fields_set.add(name)
+            if trusted_type is None or not (isinstance(value, trusted_type) or value is None and field.allow_none):
+                value = validate_field(schema, field, value, values)
+            values[name] = value
+
+        instance = object_new(schema)
+        object_setattr(instance, '__dict__', values)
+        object_setattr(instance, '__fields_set__', fields_set)
+        instance._init_private_attributes()
+        return instance
+
+    return map_row
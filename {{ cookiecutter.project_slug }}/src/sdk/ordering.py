@@ -4,6 +4,7 @@ from typing import Dict
 from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import sqlalchemy as sa
 from database import Base  # type: ignore[attr-defined]
@@ -102,6 +103,21 @@ class OrderingManager:
             additional_fields = {}
         return [self._get_ordering(model, field, additional_fields) for field in self.ordering_fields]
 
+    def get_keys(
+        self,
+        model: Base,
+        additional_fields: Optional[AdditionalFields] = None,
+    ) -> List[Tuple[str, InstrumentedAttribute, bool]]:
+        """Ordering as (name, attribute, descending) triples, used by keyset pagination."""
+        if additional_fields is None:
+            additional_fields = {}
+        keys = []
+        for field in self.ordering_fields:
+            field = self.is_available(field.strip())
+            attribute = self._get_model_attribute(model, field, additional_fields)
+            keys.append((field.lstrip('-'), attribute, field.startswith('-')))
+        return keys
+
 
 def get_ordering(
     params: str = Query(
@@ -1,10 +1,42 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from typing import List
 from typing import Optional
+from typing import Tuple
+from uuid import UUID
 
+from config import settings
 from fastapi import Query
 
 from sdk.exceptions.exceptions import make_error
 from sdk.responses import ResponseStatus
 
+PAGE_SIZES = (10, 25, 50, 100)
+
+
+class CountStrategy(str, Enum):
+    EXACT = 'exact'
+    WINDOW = 'window'  # count(*) OVER () in the page query
+    ESTIMATE = 'estimate'  # planner estimate above a threshold
+    CACHED = 'cached'  # exact count read through the query cache
+    NONE = 'none'  # no count, next page is probed with page_size + 1 rows
+
+
+def check_page_size(page_size: Optional[int]) -> None:
+    if page_size not in [*PAGE_SIZES, None]:
+        raise make_error(
+            custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
+            message='Available only 10, 25, 50, 100',
+        )
+
 
 class PaginationManager:
     """
@@ -16,11 +48,7 @@ class PaginationManager:
         page: int = Query(1),
         page_size: int = Query(25, description='Available only 10, 25, 50, 100'),
     ) -> None:
-        if page_size not in [10, 25, 50, 100, None]:
-            raise make_error(
-                custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
-                message='Available only 10, 25, 50, 100',
-            )
+        check_page_size(page_size)
         if page < 1:
             raise make_error(
                 custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
@@ -29,11 +57,21 @@ class PaginationManager:
         self.page = page - 1
         self.page_size = page_size
 
-    def get_page_count(self, count: int) -> int:
-        return count // self.page_size + count % self.page_size if self.page_size else None  # noqa: S001
+    def get_page_count(self, count: Optional[int]) -> Optional[int]:
+        if count is None or not self.page_size:
+            return None
+        return -(-count // self.page_size)
 
-    def get_next_page(self, count: int) -> Optional[int]:
-        return (self.page + 2 if count > (self.page + 1) * self.page_size else None) if self.page_size else None
+    def get_next_page(self, count: Optional[int], has_next: Optional[bool] = None) -> Optional[int]:
+        """
+        Number of the next page, if any.
+        has_next comes from a page_size + 1 probe and takes precedence over an estimated or cached count.
+        """
+        if not self.page_size:
+            return None
+        if has_next is None:
+            has_next = count is not None and count > (self.page + 1) * self.page_size
+        return self.page + 2 if has_next else None
 
     def get_prev_page(self) -> Optional[int]:
         return self.page if self.page > 0 else None
@@ -46,3 +84,78 @@ class PaginationManager:
                 custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
                 message='Page does not exists',
             )
+
+
+class CursorPaginationManager:
+    """
+    Keyset pagination manager.
+
+    A cursor is an opaque signed token with the ordering and the key values of the boundary row,
+    so every page is read with an index seek instead of skipping page * page_size rows.
+    """
+
+    NEXT = 'next'
+    PREVIOUS = 'previous'
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description='next or previous cursor of the previous response'),
+        page_size: int = Query(25, description='Available only 10, 25, 50, 100'),
+    ) -> None:
+        check_page_size(page_size)
+        self.page_size = page_size
+        self.ordering: Optional[List[str]] = None
+        self.values: Optional[List[Any]] = None
+        self.direction = self.NEXT
+        if cursor is not None:
+            self.ordering, self.values, self.direction = self.decode_cursor(cursor)
+
+    @property
+    def is_backwards(self) -> bool:
+        return self.direction == self.PREVIOUS
+
+    @staticmethod
+    def _sign(payload: bytes) -> bytes:
+        digest = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(digest).rstrip(b'=')
+
+    @staticmethod
+    def _encode_value(value: Any) -> Any:  # noqa: ANN401
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        if isinstance(value, UUID):
+            return {'u': str(value)}
+        if isinstance(value, Decimal):
+            return {'n': str(value)}
+        return value
+
+    @staticmethod
+    def _decode_value(value: Any) -> Any:  # noqa: ANN401
+        if not isinstance(value, dict):
+            return value
+        [(kind, raw)] = value.items()
+        return {'dt': datetime.fromisoformat, 'd': date.fromisoformat, 'u': UUID, 'n': Decimal}[kind](raw)
+
+    @classmethod
+    def encode_cursor(cls, ordering: List[str], values: List[Any], direction: str) -> str:
+        data = json.dumps([ordering, [cls._encode_value(value) for value in values], direction], separators=(',', ':'))
+        payload = base64.urlsafe_b64encode(data.encode()).rstrip(b'=')
+        return (payload + b'.' + cls._sign(payload)).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor: str) -> Tuple[List[str], List[Any], str]:
+        try:
+            payload, signature = cursor.encode().split(b'.')
+            if not hmac.compare_digest(signature, cls._sign(payload)):
+                raise ValueError('Invalid signature')
+            ordering, values, direction = json.loads(base64.urlsafe_b64decode(payload + b'=' * (-len(payload) % 4)))
+            if direction not in (cls.NEXT, cls.PREVIOUS):
+                raise ValueError(f'Unknown direction {direction}')
+            return ordering, [cls._decode_value(value) for value in values], direction
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            raise make_error(
+                custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
+                message='Invalid cursor',
+            )
@@ -0,0 +1,181 @@
+import asyncio
+import base64
+import enum
+import functools
+import hashlib
+import json
+import uuid
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import sqlalchemy as sa
+from cache import RedisBackend
+from cache import redis_backend
+from database import database
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.types import TypeEngine
+
+from sdk.utils import DefaultJSONEncoder
+
+# JSON has no such types, values of such columns are restored by the column type.
+DECODERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    timedelta: lambda seconds: timedelta(seconds=seconds),
+    Decimal: Decimal,
+    uuid.UUID: uuid.UUID,
+    bytes: base64.b64decode,
+}
+
+
+class QueryCacheJSONEncoder(DefaultJSONEncoder):
+    """Lossless counterpart of DECODERS: datetimes keep their microseconds and Decimal its digits."""
+
+    def default(self, o: Any) -> Any:  # noqa: ANN401, VNE001
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        elif isinstance(o, timedelta):
+            return o.total_seconds()
+        elif isinstance(o, Decimal):
+            return str(o)
+        elif isinstance(o, enum.Enum):
+            return o.value
+        elif isinstance(o, bytes):
+            return base64.b64encode(o).decode()
+        return super().default(o)
+
+
+class QueryCache:
+    """
+    Read-through cache of query results in Redis, keyed by the compiled SQL and its parameters.
+
+    Entries are invalidated by tag: every write operation bumps the tag of its table once its transaction
+    commits, an entry stores the tag versions it was read at and is a miss when they changed.
+    Reads inside a transaction bypass the cache, they have to see the uncommitted writes.
+    Concurrent misses of the same key in a worker share a single database query.
+    """
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, redis: RedisBackend) -> None:
+        self.redis = redis
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def get_tag_key(tag: str) -> str:
+        return f'qc:tag:{tag}'
+
+    @classmethod
+    def get_digest(cls, query: ClauseElement) -> str:
+        compiled = query.compile(dialect=cls.dialect, compile_kwargs={'render_postcompile': True})
+        return hashlib.sha1(f'{compiled}:{sorted(compiled.params.items())!r}'.encode()).hexdigest()  # noqa: S303
+
+    @classmethod
+    def get_decoder(cls, column_type: TypeEngine) -> Optional[Callable[[Any], Any]]:
+        if isinstance(column_type, sa.ARRAY):
+            decoder = cls.get_decoder(column_type.item_type)
+            if decoder is None:
+                return None
+            return lambda items: [item if item is None else decoder(item) for item in items]
+        try:
+            python_type = column_type.python_type
+        except NotImplementedError:
+            return None
+        if issubclass(python_type, enum.Enum):
+            return python_type
+        return DECODERS.get(python_type)
+
+    @classmethod
+    def get_decoders(cls, query: ClauseElement) -> Dict[str, Callable[[Any], Any]]:
+        decoders = {}
+        for column in getattr(query, 'selected_columns', ()):
+            decoder = cls.get_decoder(column.type)
+            if decoder is not None:
+                decoders[column.key] = decoder
+        return decoders
+
+    @classmethod
+    def decode(cls, result: Any, query: ClauseElement) -> Any:  # noqa: ANN401
+        """Restore the types of a result read from JSON, rows are dicts keyed by column."""
+        decoders = cls.get_decoders(query)
+        if not decoders:
+            return result
+
+        def decode_row(row: Any) -> Any:  # noqa: ANN401
+            if not isinstance(row, dict):
+                return row
+            for key, decoder in decoders.items():
+                if row.get(key) is not None:
+                    row[key] = decoder(row[key])
+            return row
+
+        return list(map(decode_row, result)) if isinstance(result, list) else decode_row(result)
+
+    async def get_or_set(
+        self,
+        query: ClauseElement,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        tags: Iterable[str],
+    ) -> Any:  # noqa: ANN401
+        if not self.redis.is_connected or database.in_transaction():
+            return await loader()
+
+        key = f'qc:{self.get_digest(query)}'
+        value, *versions = await self.redis.mget(key, *[self.get_tag_key(tag) for tag in tags])
+        versions = [version.decode() if version is not None else '0' for version in versions]
+        if value is not None:
+            cached_versions, result = json.loads(value)
+            if cached_versions == versions:
+                return self.decode(result, query)
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            # The query runs in its own task: a cancelled caller does not cancel the others waiting for it
+            inflight = self._inflight[key] = asyncio.ensure_future(self._load(key, versions, loader, ttl))
+            inflight.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(inflight)
+
+    async def _load(
+        self,
+        key: str,
+        versions: List[str],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+    ) -> Any:  # noqa: ANN401
+        result = await loader()
+        await self.redis.set(key, json.dumps([versions, result], cls=QueryCacheJSONEncoder), expire=ttl)
+        return result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Waiters are optional, don't report the exception as never retrieved
+
+    async def invalidate(self, *tags: str) -> None:
+        """Bump the tags once the current transaction commits, right away outside of one."""
+        await database.on_commit(functools.partial(self._invalidate, tags))
+
+    async def _invalidate(self, tags: Iterable[str]) -> None:
+        if not self.redis.is_connected:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self.get_tag_key(tag))
+            await pipe.execute()
+
+
+query_cache = QueryCache(redis_backend)
@@ -1,8 +1,17 @@
+import asyncio
+import contextlib
 import copy
+import functools
+import json
 import operator
+import uuid
 from datetime import datetime
 from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
 from typing import Tuple
@@ -11,16 +20,31 @@ from typing import Union
 
 import sqlalchemy as sa
 from asyncpg import Record
+from config import settings
 from database import ModelType  # type: ignore[attr-defined]
 from database import database  # type: ignore[attr-defined]
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import BinaryExpression
 
+from sdk.exceptions.exceptions import make_error
+from sdk.expressions import Explain
+from sdk.loaders import clear_loader
+from sdk.loaders import get_loader
+from sdk.mappers import get_row_mapper
 from sdk.models import ExpireMixin as ExpireModelMixin
 from sdk.ordering import OrderingManager
+from sdk.pagination import CountStrategy
+from sdk.pagination import CursorPaginationManager
 from sdk.pagination import PaginationManager
+from sdk.query_cache import query_cache
+from sdk.responses import ResponseStatus
 from sdk.schemas import BaseSchema
+from sdk.schemas import CursorPaginatedSchema
 from sdk.schemas import PaginatedSchema
+from sdk.utils import gather_or_cancel
+
+SNAPSHOT_TRANSACTION = {'isolation': 'repeatable_read', 'readonly': True}
 
 base_operations = {
     'not': operator.ne,
@@ -281,22 +305,28 @@ class Q(Node):
 
         raise ValueError(f'Unknown operation {operation} in lookup')
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def parse_lookup(lookup: str) -> Tuple[str, Optional[str]]:
+        """Split the lookup into a field and an operation, lookups are static so the result is cached."""
+        field, *operations = lookup.split('__')
+        operation_count = len(operations)
+        if operation_count > 1:
+            raise ValueError(f'Only one operation is allowed in lookup, got {lookup}')
+
+        return field, operations[0] if operation_count == 1 else None
+
     def get_lookup(
         self,
         model: Type[ModelType],
         lookup: str,
         value: Any,  # noqa: ANN401
     ) -> BinaryExpression:  # noqa: ANN401
-        field, *operations = lookup.split('__')
-        operation = operator.eq
-        operation_count = len(operations)
-        if operation_count > 1:
-            raise ValueError(f'Only one operation is allowed in lookup, got {lookup}')
-
-        if operation_count == 1:
-            return self.get_operation(model, field, value, operations[0])
+        field, operation = self.parse_lookup(lookup)
+        if operation is not None:
+            return self.get_operation(model, field, value, operation)
 
-        return operation(getattr(model, field), value)
+        return getattr(model, field) == value
 
     def get_where_clause(self, model: Type[ModelType]) -> BinaryExpression:
         connector = self.get_connector()
@@ -326,33 +356,206 @@ class WhereMixin:
 
 
 class PaginateMixin:
+    def get_count_query(self) -> Select:
+        return sa.select([sa.func.count()]).select_from(self.query.alias('original_query'))
+
+    def get_page_query(self, manager: PaginationManager, probe: bool = False) -> Select:
+        """Rows of the page, with one more row when probe is set to learn whether a next page exists."""
+        if manager.page_size is None:
+            return self.query
+        limit = manager.page_size + 1 if probe else manager.page_size
+        return self.query.limit(limit).offset(manager.page * manager.page_size)
+
+    async def get_estimated_count(self, threshold: int) -> int:
+        """
+        Planner estimate of the row count: pg_class.reltuples for the whole table, EXPLAIN for a filtered query.
+        Below the threshold, or for a table that was never analyzed, rows are counted exactly.
+        """
+        if self.query.whereclause is None:
+            estimate = await database.fetch_val(
+                sa.text(
+                    'SELECT CAST(reltuples AS bigint) FROM pg_class WHERE oid = CAST(:table AS regclass)',
+                ).bindparams(table=self.model.__table__.fullname),
+            )
+        else:
+            row = await database.fetch_one(Explain(self.query))
+            estimate = json.loads(row._mapping['QUERY PLAN'])[0]['Plan']['Plan Rows']
+        if estimate is None or estimate < threshold:
+            return await database.fetch_val(self.get_count_query())
+        return estimate
+
+    async def get_cached_count(self) -> int:
+        count_query = self.get_count_query()
+        return await query_cache.get_or_set(
+            count_query,
+            lambda: database.fetch_val(count_query),
+            getattr(self, 'cache_ttl', None) or settings.QUERY_CACHE_TTL,
+            (self.model.__tablename__,),
+        )
+
+    async def fetch_count_and_page(
+        self,
+        page_query: Select,
+        concurrent: bool,
+        consistent: bool,
+    ) -> Tuple[int, List[Record]]:
+        """
+        Exact count of the query and rows of the page.
+
+        concurrent runs the two queries on separate pooled connections, a failure of one cancels the other.
+        It holds two connections per request, so it is off by default and meant for counts slow enough to matter.
+        consistent reads both from the same REPEATABLE READ snapshot, so the count always agrees with the page.
+        Inside a transaction, and in the tests with force_rollback, the queries run sequentially on its connection.
+        """
+        count_query = self.get_count_query()
+        in_transaction = database.in_transaction()
+        async with contextlib.AsyncExitStack() as stack:
+            if in_transaction or not concurrent:
+                if consistent and not in_transaction:
+                    await stack.enter_async_context(database.transaction(**SNAPSHOT_TRANSACTION))
+                return await database.fetch_val(count_query), await database.fetch_all(page_query)
+
+            # Both on the same server, a snapshot can only be imported where it was exported
+            reader = database.get_reader()
+            count_connection = await stack.enter_async_context(reader.isolated_connection())
+            page_connection = await stack.enter_async_context(reader.isolated_connection())
+            if consistent:
+                await stack.enter_async_context(count_connection.transaction(**SNAPSHOT_TRANSACTION))
+                snapshot = await count_connection.fetch_val(sa.text('SELECT pg_export_snapshot()'))
+                await stack.enter_async_context(page_connection.transaction(**SNAPSHOT_TRANSACTION))
+                # Directly on the driver: the snapshot id is a literal and must not fill the statement cache
+                await page_connection.raw_connection.execute(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+            count, rows = await gather_or_cancel(
+                count_connection.fetch_val(count_query),
+                page_connection.fetch_all(page_query),
+            )
+        return count, rows
+
     async def get_paginated_response(
         self,
         model_schemer: Type[BaseSchema],
         manager: PaginationManager,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        estimate_threshold: int = settings.PAGINATION_ESTIMATE_THRESHOLD,
+        concurrent: bool = settings.PAGINATION_CONCURRENT_COUNT,
+        consistent: bool = False,
     ) -> PaginatedSchema:
-        if manager.page_size is not None:
-            paginated_query = self.query.limit(manager.page_size).offset(
-                manager.page * manager.page_size,
-            )
+        """
+        Page of the query with a total count computed by the count strategy:
+        EXACT runs count(*) over the query before the page,
+        WINDOW adds count(*) OVER () to the page query itself,
+        ESTIMATE takes the planner estimate when it is above estimate_threshold,
+        CACHED reads the exact count through the query cache,
+        NONE skips the count.
+        Non exact strategies fetch one extra row to tell whether the next page exists.
+        concurrent and consistent apply to the EXACT strategy, see fetch_count_and_page.
+        """
+        count = has_next = None
+        if manager.page_size is None:
+            rows = await database.fetch_all(self.query)
+            count = len(rows)
+        elif count_strategy == CountStrategy.EXACT:
+            count, rows = await self.fetch_count_and_page(self.get_page_query(manager), concurrent, consistent)
+            manager.check_page(count)
+        elif count_strategy == CountStrategy.WINDOW:
+            window_count = sa.func.count().over().label('__total_count')
+            rows = await database.fetch_all(self.get_page_query(manager).add_columns(window_count))
+            count = rows[0][window_count.name] if rows else 0
+            manager.check_page(count)
         else:
-            paginated_query = self.query
-        count = await database.fetch_val(
-            sa.select([sa.func.count()]).select_from(self.query.alias('original_query')),
-        )
-        manager.check_page(count)
-
-        raw_results = await database.fetch_all(paginated_query)
-        _next = manager.get_next_page(count)
-        _prev = manager.get_prev_page()
-        _page_count = manager.get_page_count(count)
-        results = [model_schemer(**dict(obj)) for obj in raw_results]
-        return PaginatedSchema(
+            rows = await database.fetch_all(self.get_page_query(manager, probe=True))
+            has_next = len(rows) > manager.page_size
+            rows = rows[: manager.page_size]
+            if not rows:
+                manager.check_page(0)
+            if count_strategy == CountStrategy.ESTIMATE:
+                count = await self.get_estimated_count(estimate_threshold)
+            elif count_strategy == CountStrategy.CACHED:
+                count = await self.get_cached_count()
+
+        # Rows are typed by the driver, neither the results nor the envelope are validated again
+        return PaginatedSchema.construct(
             total_count=count,
-            page_count=_page_count,
+            page_count=manager.get_page_count(count),
+            next=manager.get_next_page(count, has_next),
+            previous=manager.get_prev_page(),
+            results=list(map(get_row_mapper(model_schemer), rows)),
+        )
+
+    def get_cursor_keys(self) -> List[Tuple[str, Any, bool]]:
+        """Active ordering followed by the primary key, which makes the keyset unique."""
+        keys = self.ordering.get_keys(self.model) if self.ordering is not None else []
+        names = {name for name, _, _ in keys}
+        descending = keys[-1][2] if keys else False
+        for column in sa.inspect(self.model).primary_key:
+            if column.key not in names:
+                keys.append((column.key, getattr(self.model, column.key), descending))
+        return keys
+
+    @staticmethod
+    def get_keyset_clause(keys: List[Tuple[str, Any, bool]], values: List[Any], backwards: bool) -> Any:  # noqa: ANN401
+        """
+        Rows strictly after the cursor in the read direction.
+        A row value comparison is used when all the keys share a direction, so a composite index is seeked.
+        """
+        columns = [attribute for _, attribute, _ in keys]
+        greater = [descending == backwards for _, _, descending in keys]
+        if all(greater) or not any(greater):
+            compare = operator.gt if greater[0] else operator.lt
+            return compare(sa.tuple_(*columns), tuple(values))
+
+        return sa.or_(
+            *[
+                sa.and_(
+                    *[columns[j] == values[j] for j in range(i)],
+                    columns[i] > values[i] if greater[i] else columns[i] < values[i],
+                )
+                for i in range(len(columns))
+            ],
+        )
+
+    async def get_cursor_paginated_response(
+        self,
+        model_schemer: Type[BaseSchema],
+        manager: CursorPaginationManager,
+    ) -> CursorPaginatedSchema:
+        """
+        Keyset pagination over the active ordering, the cost of a page does not depend on its depth.
+        Ordering columns should be NOT NULL and covered by an index together with the primary key.
+        """
+        keys = self.get_cursor_keys()
+        ordering = [f'-{name}' if descending else name for name, _, descending in keys]
+        if manager.ordering is not None and manager.ordering != ordering:
+            raise make_error(
+                custom_code=ResponseStatus.PAGINATION_PAGE_ERROR,
+                message='Cursor does not match the ordering',
+            )
+
+        backwards = manager.is_backwards
+        direction = {True: sa.desc, False: sa.asc}
+        query = self.query.order_by(None).order_by(
+            *[direction[descending != backwards](attribute) for _, attribute, descending in keys],
+        )
+        if manager.values is not None:
+            query = query.where(self.get_keyset_clause(keys, manager.values, backwards))
+        selected = set(query.selected_columns.keys())
+        query = query.add_columns(*[attribute for name, attribute, _ in keys if name not in selected])
+
+        rows = await database.fetch_all(query.limit(manager.page_size + 1))
+        has_more = len(rows) > manager.page_size
+        rows = rows[: manager.page_size]
+        if backwards:
+            rows.reverse()
+
+        _next = _prev = None
+        if rows and (backwards or has_more):
+            _next = manager.encode_cursor(ordering, [rows[-1][name] for name, _, _ in keys], manager.NEXT)
+        if rows and (has_more if backwards else manager.values is not None):
+            _prev = manager.encode_cursor(ordering, [rows[0][name] for name, _, _ in keys], manager.PREVIOUS)
+        return CursorPaginatedSchema.construct(
             next=_next,
             previous=_prev,
-            results=results,
+            results=list(map(get_row_mapper(model_schemer), rows)),
         )
 
 
@@ -381,10 +584,13 @@ class ExpireMixin:
 
 
 class OrderMixin:
+    ordering: Optional[OrderingManager] = None
+
     def order_by(self, *args, manager: Optional[OrderingManager] = None) -> 'OrderMixin':
         if manager is None:
             manager = OrderingManager(args)
 
+        self.ordering = manager
         self.query = self.query.order_by(*manager.get_fields(self.model))
         return self
 
@@ -395,6 +601,65 @@ class ReturnMixin:
         return self
 
 
+class CacheMixin:
+    cache_ttl: Optional[int] = None
+    cache_tags: Tuple[str, ...] = ()
+
+    def cached(self, ttl: int = settings.QUERY_CACHE_TTL, tags: Iterable[str] = ()) -> 'CacheMixin':
+        """
+        Read the result through the query cache.
+        The table name is always a tag, so writes to the model invalidate the entry.
+        Selected values are stored as JSON, restored by the types of the selected columns.
+        """
+        self.cache_ttl = ttl
+        self.cache_tags = (self.model.__tablename__, *tags)
+        return self
+
+    async def fetch_cached(self, fetch: Callable[[], Awaitable[Any]]) -> Any:  # noqa: ANN401
+        if self.cache_ttl is None:
+            return await fetch()
+        return await query_cache.get_or_set(self.query, fetch, self.cache_ttl, self.cache_tags)
+
+
+class InvalidateMixin:
+    async def invalidate_cache(self) -> None:
+        clear_loader(self.model)
+        await query_cache.invalidate(self.model.__tablename__)
+
+
+class BulkMixin:
+    returning_fields: Tuple[str, ...] = ()
+
+    @staticmethod
+    def get_item_fields(items: List[Dict[str, Any]]) -> List[str]:
+        fields = list(items[0]) if items else []
+        if any(item.keys() != items[0].keys() for item in items):
+            raise ValueError('All the items must have the same keys')
+        return fields
+
+    def returning(self, *fields: str) -> 'BulkMixin':
+        self.returning_fields = fields
+        return self
+
+    async def execute_chunks(self, queries: Iterable[Any]) -> Optional[List[Record]]:
+        """Run the statements of the chunks in one transaction, rows of the returning fields are collected."""
+        rows = []
+        async with database.transaction():
+            for query in queries:
+                if self.returning_fields:
+                    query = query.returning(*[getattr(self.model, field) for field in self.returning_fields])
+                    rows.extend(await database.fetch_all(query))
+                else:
+                    await database.execute(query)
+        return rows if self.returning_fields else None
+
+    @staticmethod
+    def get_array(column: sa.Column, values: List[Any]) -> Any:  # noqa: ANN401
+        """Values as a single typed array parameter, the statement has the same shape for any number of rows."""
+        array_type = postgresql.ARRAY(column.type)
+        return sa.cast(sa.bindparam(None, values, type_=array_type), array_type)
+
+
 class BaseOperation:
     @classmethod
     def get_base_query(
@@ -409,8 +674,26 @@ class BaseOperation:
             select = tuple(getattr(model, field) for field in fields)
         return sa.select(select)
 
-
-class GetOperation(BaseOperation, ExpireMixin, OrderMixin, WhereMixin, PaginateMixin):
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def get_projection(model: Type[ModelType], schema: Type[BaseSchema]) -> Tuple[str, ...]:
+        """
+        Columns of the model the schema is built from. A computed field is built from its sources,
+        declared in the schema Config, e.g. computed_fields = {'avatar_url': ('avatar',)}.
+        """
+        columns = sa.inspect(model).columns
+        computed = getattr(schema.__config__, 'computed_fields', {})
+        fields: List[str] = []
+        for name in schema.__fields__:
+            for source in computed.get(name, (name,)):
+                if source not in columns:
+                    raise ValueError(f'{schema.__name__}.{name} has no column {source!r} in {model.__name__}')
+                if source not in fields:
+                    fields.append(source)
+        return tuple(fields)
+
+
+class GetOperation(BaseOperation, ExpireMixin, OrderMixin, WhereMixin, PaginateMixin, CacheMixin):
     def __init__(
         self,
         model: Type[ModelType],
@@ -424,12 +707,43 @@ class GetOperation(BaseOperation, ExpireMixin, OrderMixin, WhereMixin, PaginateM
         self.all = get_all
 
     async def execute(self) -> Union[List[Record], Optional[Record]]:
+        if self.cache_ttl is not None:
+            return await self.fetch_cached(self._fetch_mappings)
         if self.all:
             return await database.fetch_all(self.query)
         return await database.fetch_one(self.query)
 
+    async def chunks(
+        self,
+        chunk_size: int = settings.DB_ITERATE_CHUNK_SIZE,
+        schema: Optional[Type[BaseSchema]] = None,
+    ) -> AsyncIterator[List[Union[Record, BaseSchema]]]:
+        """
+        Stream the result in chunks from a server-side cursor, for exports and batch jobs.
+        Only one chunk is held in memory, rows are mapped to the schema when it is given.
+        """
+        async for rows in database.iterate_chunks(self.query, chunk_size):
+            yield list(map(get_row_mapper(schema), rows)) if schema is not None else rows
 
-class CreateOperation(BaseOperation, ReturnMixin, ExpireMixin, WhereMixin):
+    async def iterate(
+        self,
+        chunk_size: int = settings.DB_ITERATE_CHUNK_SIZE,
+        schema: Optional[Type[BaseSchema]] = None,
+    ) -> AsyncIterator[Union[Record, BaseSchema]]:
+        """Row by row variant of chunks()."""
+        async for chunk in self.chunks(chunk_size, schema):
+            for row in chunk:
+                yield row
+
+    async def _fetch_mappings(self) -> Union[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Plain dicts instead of driver records, so results can be cached."""
+        if self.all:
+            return [dict(row) for row in await database.fetch_all(self.query)]
+        row = await database.fetch_one(self.query)
+        return dict(row) if row is not None else None
+
+
+class CreateOperation(BaseOperation, ReturnMixin, ExpireMixin, WhereMixin, InvalidateMixin):
     def __init__(
         self,
         model: Type[ModelType],
@@ -437,48 +751,348 @@ class CreateOperation(BaseOperation, ReturnMixin, ExpireMixin, WhereMixin):
         **kwargs,
     ) -> None:
         self.model = model
-        self.query = sa.insert(model).values(**kwargs if kwargs else items)
+        self.query = postgresql.insert(model).values(kwargs if kwargs else items)
+
+    def on_conflict_do_nothing(self, *index_elements: str) -> 'CreateOperation':
+        """
+        Skip the row when it violates a unique constraint, in the same round trip.
+        With returning() execute() then returns None when the row already existed.
+        """
+        self.query = self.query.on_conflict_do_nothing(index_elements=index_elements or None)
+        return self
 
     async def execute(self) -> Optional[Record]:
-        return await database.execute(self.query)
+        result = await database.execute(self.query)
+        await self.invalidate_cache()
+        return result
 
 
-class UpdateOperation(BaseOperation, ReturnMixin, ExpireMixin, WhereMixin):
+class BulkCreateOperation(BaseOperation, BulkMixin, InvalidateMixin):
+    """
+    Insert many rows: multi-row VALUES statements chunked under the bind parameter limit,
+    or COPY for large batches without RETURNING and conflict handling.
+
+    Every item must have the same keys.
+    """
+
+    max_bind_params = 32767
+
+    def __init__(self, model: Type[ModelType], items: List[Dict[str, Any]]) -> None:
+        self.model = model
+        self.items = items
+        self.columns = self.get_item_fields(items)
+        self.copy_threshold = settings.DB_COPY_THRESHOLD
+        self.conflict_target: Optional[Tuple[str, ...]] = None
+        self.conflict_update: Tuple[str, ...] = ()
+
+    def on_conflict_do_nothing(self, *index_elements: str) -> 'BulkCreateOperation':
+        self.conflict_target = index_elements
+        self.conflict_update = ()
+        return self
+
+    def on_conflict_do_update(
+        self,
+        index_elements: Iterable[str],
+        update_fields: Optional[Iterable[str]] = None,
+    ) -> 'BulkCreateOperation':
+        """Update update_fields from the excluded row, by default all the inserted fields but the key ones."""
+        self.conflict_target = tuple(index_elements)
+        if update_fields is None:
+            keys = {*self.conflict_target, *(column.key for column in sa.inspect(self.model).primary_key)}
+            update_fields = [column for column in self.columns if column not in keys]
+        self.conflict_update = tuple(update_fields)
+        return self
+
+    def get_items(self) -> List[Dict[str, Any]]:
+        if not self.conflict_update:
+            return self.items
+        # A statement can't update the same row twice, the last item of a conflict key wins
+        return list({tuple(item[key] for key in self.conflict_target): item for item in self.items}.values())
+
+    def get_onupdate_values(self) -> Dict[str, Any]:
+        """
+        Values of the columns with onupdate, e.g. updated_at, which are not among the updated fields.
+        ON CONFLICT DO UPDATE is an INSERT to SQLAlchemy, it doesn't apply onupdate by itself.
+        """
+        values = {}
+        for column in self.model.__table__.columns:
+            onupdate = column.onupdate
+            if onupdate is None or column.key in self.conflict_update:
+                continue
+            values[column.key] = onupdate.arg(None) if onupdate.is_callable else onupdate.arg
+        return values
+
+    def get_values_query(self, items: List[Dict[str, Any]]) -> postgresql.Insert:
+        query = postgresql.insert(self.model).values(items)
+        if self.conflict_update:
+            query = query.on_conflict_do_update(
+                index_elements=self.conflict_target,
+                set_={
+                    **{field: query.excluded[field] for field in self.conflict_update},
+                    **self.get_onupdate_values(),
+                },
+            )
+        elif self.conflict_target is not None:
+            query = query.on_conflict_do_nothing(index_elements=self.conflict_target or None)
+        return query
+
+    def get_copy_columns(self) -> Optional[List[sa.Column]]:
+        """
+        Columns of the COPY, including the omitted ones with a Python default, which COPY doesn't apply.
+        None when an omitted column has a SQL expression default, the rows then need INSERT.
+        """
+        columns = []
+        for column in self.model.__table__.columns:
+            if column.key in self.columns:
+                columns.append(column)
+            elif column.default is not None:
+                if not (column.default.is_scalar or column.default.is_callable):
+                    return None
+                columns.append(column)
+        return columns
+
+    def can_copy(self) -> bool:
+        return (
+            len(self.items) >= self.copy_threshold
+            and not self.returning_fields
+            and self.conflict_target is None
+            and self.get_copy_columns() is not None
+        )
+
+    async def execute_values(self) -> Optional[List[Record]]:
+        items = self.get_items()
+        # Python defaults of the omitted columns are bound too, count every column of the table
+        chunk_size = self.max_bind_params // len(self.model.__table__.columns)
+        return await self.execute_chunks(
+            self.get_values_query(items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)
+        )
+
+    @staticmethod
+    def get_copy_getter(column: sa.Column, provided: bool) -> Callable[[Dict[str, Any]], Any]:
+        """Value of the column in a COPY record: the item value or the Python default, through the bind processor."""
+        default = column.default
+        process = column.type._cached_bind_processor(database.dialect)
+
+        def getter(item: Dict[str, Any]) -> Any:  # noqa: ANN401
+            if provided:
+                value = item[column.key]
+            else:
+                value = default.arg(None) if default.is_callable else default.arg
+            return process(value) if process is not None else value
+
+        return getter
+
+    async def execute_copy(self) -> None:
+        columns = self.get_copy_columns()
+        getters = [self.get_copy_getter(column, column.key in self.columns) for column in columns]
+        database.mark_write()
+        async with database.connection() as connection:
+            await connection.raw_connection.copy_records_to_table(
+                self.model.__table__.name,
+                schema_name=self.model.__table__.schema,
+                columns=[column.name for column in columns],
+                records=(tuple(getter(item) for getter in getters) for item in self.items),
+            )
+
+    async def execute(self) -> Optional[List[Record]]:
+        """Rows of the returning fields, if any were requested."""
+        if not self.items:
+            return [] if self.returning_fields else None
+        if self.can_copy():
+            await self.execute_copy()
+            result = None
+        else:
+            result = await self.execute_values()
+        await self.invalidate_cache()
+        return result
+
+
+class BulkUpdateOperation(BaseOperation, BulkMixin, InvalidateMixin):
+    """
+    Update every row with its own values in one statement per chunk:
+    UPDATE ... FROM unnest(<array per field>) joined on the key fields, the primary key by default.
+    """
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        items: List[Dict[str, Any]],
+        key_fields: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.model = model
+        self.items = items
+        self.fields = self.get_item_fields(items)
+        self.key_fields = tuple(key_fields or (column.key for column in sa.inspect(model).primary_key))
+        if items and not set(self.key_fields) < set(self.fields):
+            raise ValueError(f'Items must have the key fields {self.key_fields} and the fields to update')
+        self.chunk_size = settings.DB_BULK_CHUNK_SIZE
+
+    def get_query(self, items: List[Dict[str, Any]]) -> sa.sql.Update:
+        columns = self.model.__table__.columns
+        arrays = [self.get_array(columns[field], [item[field] for item in items]) for field in self.fields]
+        data = sa.func.unnest(*arrays).table_valued(*self.fields).render_derived()
+        return (
+            sa.update(self.model)
+            .where(*[getattr(self.model, field) == data.c[field] for field in self.key_fields])
+            .values({field: data.c[field] for field in self.fields if field not in self.key_fields})
+        )
+
+    async def execute(self) -> Optional[List[Record]]:
+        if not self.items:
+            return [] if self.returning_fields else None
+        result = await self.execute_chunks(
+            self.get_query(self.items[start:start + self.chunk_size])
+            for start in range(0, len(self.items), self.chunk_size)
+        )
+        await self.invalidate_cache()
+        return result
+
+
+class UpdateOperation(BaseOperation, ReturnMixin, ExpireMixin, WhereMixin, InvalidateMixin):
     def __init__(self, model: Type[ModelType], **kwargs) -> None:
         self.model = model
         self.query = sa.update(model).values(**kwargs)
 
     async def execute(self) -> Optional[Record]:
-        return await database.execute(self.query)
+        result = await database.execute(self.query)
+        await self.invalidate_cache()
+        return result
 
 
-class DeleteOperation(BaseOperation, ExpireMixin, WhereMixin):
+class DeleteOperation(BaseOperation, ExpireMixin, WhereMixin, InvalidateMixin):
     def __init__(self, model: Type[ModelType]) -> None:
         self.model = model
         self.query = sa.delete(model)
 
     async def execute(self) -> Optional[Record]:
-        return await database.execute(self.query)
+        result = await database.execute(self.query)
+        await self.invalidate_cache()
+        return result
+
 
+class BulkDeleteOperation(BaseOperation, BulkMixin, InvalidateMixin):
+    """Delete rows by a list of keys with key = ANY(<array>), in one statement per chunk."""
 
-class CountOperation(BaseOperation, ExpireMixin, WhereMixin):
+    def __init__(self, model: Type[ModelType], keys: List[Any], key_field: Optional[str] = None) -> None:
+        self.model = model
+        self.keys = keys
+        if key_field is None:
+            primary_key = sa.inspect(model).primary_key
+            if len(primary_key) != 1:
+                raise ValueError(f'{model} has a composite primary key, the key field is required')
+            key_field = primary_key[0].key
+        self.key_field = key_field
+        self.chunk_size = settings.DB_BULK_CHUNK_SIZE
+
+    def get_query(self, keys: List[Any]) -> sa.sql.Delete:
+        column = self.model.__table__.columns[self.key_field]
+        return sa.delete(self.model).where(column == sa.any_(self.get_array(column, keys)))
+
+    async def execute(self) -> Optional[List[Record]]:
+        if not self.keys:
+            return [] if self.returning_fields else None
+        result = await self.execute_chunks(
+            self.get_query(self.keys[start:start + self.chunk_size])
+            for start in range(0, len(self.keys), self.chunk_size)
+        )
+        await self.invalidate_cache()
+        return result
+
+
+class CountOperation(BaseOperation, ExpireMixin, WhereMixin, CacheMixin):
     def __init__(self, model: Type[ModelType]) -> None:
         self.model = model
         self.query = sa.select([sa.func.count()]).select_from(model)
 
     async def execute(self) -> Optional[Record]:
-        return await database.execute(self.query)
+        return await self.fetch_cached(lambda: database.execute(self.query))
+
+
+class ExistsOperation(BaseOperation, ExpireMixin, WhereMixin, CacheMixin):
+    def __init__(self, model: Type[ModelType]) -> None:
+        self.model = model
+        self.query = sa.select([sa.literal_column('1')]).select_from(model)
+
+    async def execute(self) -> bool:
+        """SELECT EXISTS stops at the first matching row, unlike a count."""
+        return await self.fetch_cached(lambda: database.fetch_val(sa.select([self.query.exists()])))
 
 
 class BaseRepository(BaseOperation):
     model: Type[ModelType]
+    # Schemas read with get(schema=...), their columns are resolved on import to fail the startup on a mismatch
+    projections: Tuple[Type[BaseSchema], ...] = ()
+    # Loader batches are read through the query cache only when set, a batch is cached under its exact keys
+    loader_cache_ttl: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for schema in cls.projections:
+            cls.get_projection(cls.model, schema)
+
+    @classmethod
+    def get_fields(cls, fields: Tuple[str, ...], schema: Optional[Type[BaseSchema]]) -> Tuple[str, ...]:
+        if schema is None:
+            return fields
+        return fields + tuple(field for field in cls.get_projection(cls.model, schema) if field not in fields)
+
+    @classmethod
+    def get_primary_key(cls) -> sa.Column:
+        primary_key = sa.inspect(cls.model).primary_key
+        if len(primary_key) != 1:
+            raise ValueError(f'{cls.model} has a composite primary key')
+        return primary_key[0]
+
+    @classmethod
+    def get_loader_key(cls, key: Any) -> Any:  # noqa: ANN401
+        """Same key for a UUID and its string, as callers pass either."""
+        if isinstance(cls.get_primary_key().type, postgresql.UUID):
+            return uuid.UUID(str(key))
+        return key
+
+    @classmethod
+    def get_loader_fields(cls) -> Tuple[str, ...]:
+        """The primary key and the columns of the projections, the whole row for a repository without them."""
+        if not cls.projections:
+            return ()
+        fields: Tuple[str, ...] = (cls.get_primary_key().key,)
+        for schema in cls.projections:
+            fields = cls.get_fields(fields, schema)
+        return fields
+
+    @classmethod
+    async def batch_load(cls, keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        column = cls.get_primary_key()
+        operation = cls.all(*cls.get_loader_fields())
+        operation.query = operation.query.where(column == sa.any_(BulkMixin.get_array(column, keys)))
+        if cls.loader_cache_ttl is not None:
+            operation.cached(cls.loader_cache_ttl)
+        rows = await operation.execute()
+        return {cls.get_loader_key(row[column.key]): row for row in rows}
+
+    @classmethod
+    async def load(cls, key: Any) -> Optional[Dict[str, Any]]:  # noqa: ANN401
+        """
+        Row by primary key, with the columns of the projections. Loads of one event loop tick in a request
+        are batched into a single query, results are memoized until the request ends or the model is written.
+        """
+        loader = get_loader(cls.model, cls.batch_load, settings.DB_BULK_CHUNK_SIZE)
+        return await loader.load(cls.get_loader_key(key))
+
+    @classmethod
+    async def load_many(cls, keys: Iterable[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Rows of the keys, batched by one loader also outside of a loader scope."""
+        loader = get_loader(cls.model, cls.batch_load, settings.DB_BULK_CHUNK_SIZE)
+        return list(await asyncio.gather(*[loader.load(cls.get_loader_key(key)) for key in keys]))
 
     @classmethod
     def get(
         cls,
         *args: str,
+        schema: Optional[Type[BaseSchema]] = None,
     ) -> GetOperation:
-        return GetOperation(cls.model, args)
+        """Select the given fields, and the columns the schema needs, or the whole row when neither is given."""
+        return GetOperation(cls.model, cls.get_fields(args, schema))
 
     @classmethod
     def create(
@@ -487,6 +1101,26 @@ class BaseRepository(BaseOperation):
     ) -> CreateOperation:
         return CreateOperation(cls.model, **kwargs)
 
+    @classmethod
+    def bulk_create(
+        cls,
+        items: List[Dict[str, Any]],
+    ) -> BulkCreateOperation:
+        return BulkCreateOperation(cls.model, items)
+
+    @classmethod
+    def upsert(
+        cls,
+        items: List[Dict[str, Any]],
+        index_elements: Iterable[str],
+        update_fields: Optional[Iterable[str]] = None,
+    ) -> BulkCreateOperation:
+        """
+        INSERT ... ON CONFLICT (index_elements) DO UPDATE of update_fields, all the other fields by default.
+        Use bulk_create(items).on_conflict_do_nothing(...) to keep the existing rows.
+        """
+        return BulkCreateOperation(cls.model, items).on_conflict_do_update(index_elements, update_fields)
+
     @classmethod
     def update(
         cls,
@@ -494,19 +1128,40 @@ class BaseRepository(BaseOperation):
     ) -> UpdateOperation:
         return UpdateOperation(cls.model, **kwargs)
 
+    @classmethod
+    def bulk_update(
+        cls,
+        items: List[Dict[str, Any]],
+        key_fields: Optional[Iterable[str]] = None,
+    ) -> BulkUpdateOperation:
+        return BulkUpdateOperation(cls.model, items, key_fields)
+
     @classmethod
     def delete(
         cls,
     ) -> DeleteOperation:
         return DeleteOperation(cls.model)
 
+    @classmethod
+    def bulk_delete(
+        cls,
+        keys: List[Any],
+        key_field: Optional[str] = None,
+    ) -> BulkDeleteOperation:
+        return BulkDeleteOperation(cls.model, keys, key_field)
+
     @classmethod
     def all(
         cls,
         *args: str,
+        schema: Optional[Type[BaseSchema]] = None,
     ) -> GetOperation:
-        return GetOperation(cls.model, args, get_all=True)
+        return GetOperation(cls.model, cls.get_fields(args, schema), get_all=True)
 
     @classmethod
     def count(cls) -> CountOperation:
         return CountOperation(cls.model)
+
+    @classmethod
+    def exists(cls) -> ExistsOperation:
+        return ExistsOperation(cls.model)
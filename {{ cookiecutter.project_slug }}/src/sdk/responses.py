@@ -1,15 +1,20 @@
+import json
 from enum import Enum
 from typing import Any
 from typing import Generic
 from typing import List
 from typing import Optional
 from typing import TypeVar
+from uuid import UUID
 
 from fastapi import status
 from pydantic import BaseModel
+from pydantic import ValidationError
 from pydantic.generics import GenericModel
+from pydantic.utils import ROOT_KEY
 from starlette.responses import Response
 
+from sdk.routing import validate_response
 from sdk.schemas import BaseSchema
 
 AnyResponseType = TypeVar('AnyResponseType')
@@ -92,13 +97,41 @@ class DefaultResponse(Response):
         super().__init__(*args, **kwargs)
 
     def render(self, content: Any) -> bytes:  # noqa: ANN401
-        return (
-            DefaultResponseSchema(
-                custom_code=self.custom_code,
-                message=self.message,
-                details=self.details,
-                data=content,
-            )
-            .json()
-            .encode()
-        )
+        """
+        Same bytes as DefaultResponseSchema(...).json(), without validating the payload again.
+        The envelope fields are still validated: an unknown custom_code is rejected,
+        details are cast to FieldErrorSchema.
+        """
+        envelope = {
+            'custom_code': validate_envelope_field('custom_code', self.custom_code),
+            'message': validate_envelope_field('message', self.message),
+            'details': validate_envelope_field('details', self.details),
+            'data': content,
+        }
+        validate_response(envelope)
+        return json.dumps(envelope, default=encode_default).encode()
+
+
+def validate_envelope_field(name: str, value: Any) -> Any:  # noqa: ANN401
+    field = DefaultResponseSchema.__fields__[name]
+    value, errors = field.validate(value, {}, loc=name, cls=DefaultResponseSchema)
+    if errors:
+        raise ValidationError([errors], DefaultResponseSchema)
+    return value
+
+
+def encode_default(o: Any) -> Any:  # noqa: ANN401, VNE001
+    """
+    Models are written by their field values, the way .dict() converts them,
+    everything else with the encoders of DefaultResponseSchema.
+    """
+    if isinstance(o, BaseModel):
+        if o.__custom_root_type__:
+            return o.__dict__[ROOT_KEY]
+        if o.__include_fields__ is not None or o.__exclude_fields__ is not None:
+            return o.dict()
+        return o.__dict__
+    if isinstance(o, UUID):
+        # The most frequent value of the payloads, its encoder is str() but looking it up costs more than the call
+        return str(o)
+    return DefaultResponseSchema.__json_encoder__(o)
@@ -0,0 +1,74 @@
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import Dict
+from typing import Optional
+from typing import Type
+
+from config import settings
+from fastapi.routing import APIRoute
+from fastapi.routing import APIRouter
+from pydantic import ValidationError
+from pydantic.fields import ModelField
+from starlette.requests import Request
+from starlette.responses import Response
+
+_response_field: ContextVar[Optional[ModelField]] = ContextVar('response_field', default=None)
+
+
+def validate_response(envelope: Dict[str, Any]) -> None:
+    """Check the envelope of a DefaultResponse against the response_model of the current route, if enabled."""
+    response_field = _response_field.get()
+    if response_field is None:
+        return
+    _, errors = response_field.validate(envelope, {}, loc=('response',))
+    if errors:
+        raise ValidationError([errors], response_field.type_)
+
+
+class DefaultResponseRoute(APIRoute):
+    """
+    Route of the views returning DefaultResponse.
+
+    FastAPI does not serialize returned responses through response_model, so the body is only ever
+    rendered by DefaultResponse and the documented schema is not checked at runtime.
+    With RESPONSE_VALIDATION, a development check, the route hands its response_model to the render,
+    which validates the envelope against it and fails the request on a mismatch.
+    Validation does not change the bytes.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        response_field = self.response_field if settings.RESPONSE_VALIDATION else None
+        if response_field is None:
+            return handler
+
+        async def route_handler(request: Request) -> Response:
+            # Sync views run in a thread with a copy of the context, they see the field too
+            token = _response_field.set(response_field)
+            try:
+                return await handler(request)
+            finally:
+                _response_field.reset(token)
+
+        return route_handler
+
+
+class DefaultResponseRouter(APIRouter):
+    """
+    Router whose route_class also applies to the routes of the included routers.
+
+    FastAPI keeps the class an included route was declared with, so routes of plain sub-routers
+    are rebuilt with the route_class of this router.
+    """
+
+    def add_api_route(
+        self,
+        *args,
+        route_class_override: Optional[Type[APIRoute]] = None,
+        **kwargs,
+    ) -> None:
+        if route_class_override is APIRoute:
+            route_class_override = None
+        super().add_api_route(*args, route_class_override=route_class_override, **kwargs)
@@ -27,13 +27,19 @@ class UUIDSchemaMixin(BaseSchema):
 
 
 class PaginatedSchema(GenericModel, Generic[BaseSchemaType]):
-    total_count: int = 0
-    page_count: int
+    total_count: Optional[int] = 0
+    page_count: Optional[int]
     next: Optional[int]  # noqa: VNE003
     previous: Optional[int]
     results: List[BaseSchemaType]
 
 
+class CursorPaginatedSchema(GenericModel, Generic[BaseSchemaType]):
+    next: Optional[str]  # noqa: VNE003
+    previous: Optional[str]
+    results: List[BaseSchemaType]
+
+
 class ExpireSchemaMixin(BaseSchema):
     start_at: datetime
     end_at: datetime
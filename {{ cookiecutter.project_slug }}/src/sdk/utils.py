@@ -1,8 +1,10 @@
+import asyncio
 import json
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Any
+from typing import Awaitable
 from typing import List
 from typing import Optional
 from uuid import UUID
@@ -79,6 +81,27 @@ async def send_mail(
     await smtp.quit()
 
 
+async def gather_or_cancel(*aws: Awaitable[Any]) -> List[Any]:
+    """
+    Run the awaitables concurrently like asyncio.gather, but once one of them fails or the caller is cancelled
+    the others are cancelled and awaited, so no query keeps running on its connection.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    errors = [task.exception() for task in tasks if not task.cancelled() and task.exception() is not None]
+    if errors:
+        raise errors[0]
+    return [task.result() for task in tasks]
+
+
 class DefaultJSONEncoder(json.JSONEncoder):
     def default(self, o: Any) -> Any:  # noqa: ANN401, VNE001
         if isinstance(o, datetime):
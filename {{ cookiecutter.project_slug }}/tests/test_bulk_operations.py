@@ -0,0 +1,25 @@
+from sqlalchemy.dialects import postgresql
+
+from api.v1.users.repositories import UserRepository
+
+
+def compile_conflict_clause(query: postgresql.Insert) -> str:
+    return str(query.compile(dialect=postgresql.dialect())).partition(' ON CONFLICT ')[2]
+
+
+def test_upsert_applies_onupdate_columns() -> None:
+    items = [{'phone_number': '+380501234567', 'name': 'User'}]
+    operation = UserRepository.bulk_create(items).on_conflict_do_update(['phone_number'])
+
+    clause = compile_conflict_clause(operation.get_values_query(items))
+
+    assert clause == '(phone_number) DO UPDATE SET updated_at = now(), name = excluded.name'
+
+
+def test_upsert_keeps_an_explicit_onupdate_value() -> None:
+    items = [{'phone_number': '+380501234567', 'updated_at': None}]
+    operation = UserRepository.bulk_create(items).on_conflict_do_update(['phone_number'])
+
+    clause = compile_conflict_clause(operation.get_values_query(items))
+
+    assert clause == '(phone_number) DO UPDATE SET updated_at = excluded.updated_at'
@@ -0,0 +1,24 @@
+import pytest
+from cache import RedisBackend
+from utils import MockCacheBackend
+
+
+def test_pool_stats_before_connect() -> None:
+    assert RedisBackend().pool_stats() == {'in_use': 0, 'idle': 0, 'created': 0, 'max_connections': None}
+
+
+@pytest.mark.asyncio()
+async def test_pool_stats(redis: MockCacheBackend) -> None:
+    await redis.ping()
+
+    stats = redis.pool_stats()
+
+    assert stats['in_use'] + stats['idle'] == stats['created'] >= 1
+
+
+@pytest.mark.asyncio()
+async def test_getdel(redis: MockCacheBackend) -> None:
+    await redis.set('key', 'value', expire=60)
+
+    assert await redis.getdel('key') == b'value'
+    assert await redis.get('key') is None
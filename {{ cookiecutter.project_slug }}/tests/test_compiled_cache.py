@@ -0,0 +1,36 @@
+from typing import Generator
+from typing import List
+
+import pytest
+import sqlalchemy as sa
+from database import PostgresBackend
+from database import PostgresConnection
+from databases.backends import postgres
+from pytest_mock import MockerFixture
+
+items = sa.table('items', sa.column('id', sa.Integer), sa.column('name', sa.String))
+
+
+@pytest.fixture()
+def connection() -> Generator[PostgresConnection, None, None]:
+    PostgresConnection.compiled_cache.clear()
+    yield PostgresBackend('postgresql://localhost/db').connection()
+    PostgresConnection.compiled_cache.clear()
+
+
+@pytest.mark.parametrize('ids', [[1, 2, 3], [4, 5], [6, 7, 8]])
+def test_expanded_in_matches_the_driver_compile(connection: PostgresConnection, ids: List[int]) -> None:
+    query = sa.select([items]).where(items.c.id.in_(ids), items.c.name == 'item')
+    connection._compile(sa.select([items]).where(items.c.id.in_([0]), items.c.name == 'other'))
+
+    assert connection._compile(query)[:2] == postgres.PostgresConnection._compile(connection, query)[:2]
+
+
+def test_in_query_is_compiled_once(connection: PostgresConnection, mocker: MockerFixture) -> None:
+    compiler = mocker.spy(connection._dialect, 'statement_compiler')
+
+    for ids in ([1, 2, 3], [4, 5], [6, 7, 8]):
+        connection._compile(sa.select([items]).where(items.c.id.in_(ids)))
+
+    assert compiler.call_count == 1
+    assert PostgresConnection.compiled_cache_stats()['size'] == 1
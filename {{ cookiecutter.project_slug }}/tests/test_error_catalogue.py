@@ -0,0 +1,54 @@
+import pytest
+from fastapi.exceptions import HTTPException
+from starlette import status
+
+from sdk.exceptions.catalogue import error_catalogue
+from sdk.exceptions.exceptions import AppException
+from sdk.exceptions.exceptions import make_error
+from sdk.exceptions.handlers import app_exception_handler
+from sdk.exceptions.handlers import fastapi_exception_error_handler
+from sdk.responses import DefaultResponse
+from sdk.responses import ResponseStatus
+
+invalid_code = error_catalogue.register(ResponseStatus.AUTHORIZATION_CODE_INVALID, 'Invalid code.', code='Wrong')
+not_authenticated = error_catalogue.register(ResponseStatus.UNAUTHORIZED, 'Not authenticated')
+
+
+def test_registered_error_is_served_pre_rendered() -> None:
+    with pytest.raises(AppException) as exc_info:
+        raise invalid_code()
+    exc = exc_info.value
+
+    response = app_exception_handler(None, exc)
+
+    assert exc.catalogue_key is not None
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.body == app_exception_handler(None, make_error(exc.custom_code, exc.message, code='Wrong')).body
+    assert response.body == error_catalogue.get(exc.catalogue_key)
+
+
+def test_factory_raises_a_new_exception_every_time() -> None:
+    first, second = invalid_code(), invalid_code()
+
+    assert first is not second
+    assert first.field_errors is not second.field_errors
+
+
+def test_unregistered_error_is_rendered() -> None:
+    exc = make_error(ResponseStatus.USER_NOT_FOUND, 'User not found')
+
+    response = app_exception_handler(None, exc)
+
+    assert isinstance(response, DefaultResponse)
+    assert response.body == DefaultResponse(custom_code=exc.custom_code, message=exc.message, details=[]).body
+
+
+@pytest.mark.parametrize('detail', ['Not authenticated', 'Not Found'])
+def test_http_exception_matches_the_rendered_one(detail: str) -> None:
+    exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+    response = fastapi_exception_error_handler(None, exc)
+
+    expected = DefaultResponse(custom_code=ResponseStatus.UNAUTHORIZED, message=detail, details=[])
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.body == expected.body
@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Type
+
+import pytest
+from pytest_mock import MockerFixture
+
+from api.v1.users.repositories import UserRepository
+from sdk import repositories
+from sdk.loaders import DataLoader
+from sdk.loaders import clear_loader
+from sdk.loaders import get_loader
+from sdk.loaders import loader_scope
+from sdk.repositories import BaseRepository
+
+
+class BatchLoad:
+    def __init__(self, error: Exception = None) -> None:
+        self.batches: List[List[Hashable]] = []
+        self.error = error
+
+    async def __call__(self, keys: List[Hashable]) -> Dict[Hashable, str]:
+        self.batches.append(keys)
+        if self.error is not None:
+            raise self.error
+        return {key: f'value {key}' for key in keys if key != 'missing'}
+
+
+@pytest.mark.asyncio()
+async def test_loads_of_one_tick_are_batched() -> None:
+    batch_load = BatchLoad()
+    loader = DataLoader(batch_load, max_batch_size=2)
+
+    values = await asyncio.gather(*[loader.load(key) for key in (1, 2, 3, 1, 'missing')])
+
+    assert values == ['value 1', 'value 2', 'value 3', 'value 1', None]
+    assert batch_load.batches == [[1, 2], [3, 'missing']]
+
+
+@pytest.mark.asyncio()
+async def test_results_are_memoized_until_cleared() -> None:
+    batch_load = BatchLoad()
+    loader = DataLoader(batch_load, max_batch_size=10)
+
+    await loader.load(1)
+    await loader.load(1)
+    loader.clear(1)
+    await loader.load(1)
+
+    assert batch_load.batches == [[1], [1]]
+
+
+@pytest.mark.asyncio()
+async def test_failed_batch_is_not_memoized() -> None:
+    batch_load = BatchLoad(error=ValueError('Batch failed'))
+    loader = DataLoader(batch_load, max_batch_size=10)
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+    batch_load.error = None
+
+    assert [str(result) for result in results] == ['Batch failed', 'Batch failed']
+    assert await loader.load(1) == 'value 1'
+    assert batch_load.batches == [[1, 2], [1]]
+
+
+@pytest.mark.asyncio()
+async def test_cancelled_caller_does_not_cancel_the_load() -> None:
+    loader = DataLoader(BatchLoad(), max_batch_size=10)
+
+    cancelled = asyncio.ensure_future(loader.load(1))
+    waiting = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == 'value 1'
+    assert cancelled.cancelled()
+
+
+@pytest.mark.asyncio()
+async def test_loaders_are_shared_in_a_scope() -> None:
+    batch_load = BatchLoad()
+
+    assert get_loader('users', batch_load, 10) is not get_loader('users', batch_load, 10)
+    with loader_scope():
+        loader = get_loader('users', batch_load, 10)
+        assert get_loader('users', batch_load, 10) is loader
+        await loader.load(1)
+        clear_loader('users')
+        await loader.load(1)
+
+    assert batch_load.batches == [[1], [1]]
+
+
+def test_repository_loads_the_columns_of_its_projections() -> None:
+    assert UserRepository.get_loader_fields() == ('uuid', 'name', 'phone_number', 'email', 'avatar')
+
+
+class UncachedUserRepository(UserRepository):
+    loader_cache_ttl = None
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(('repository', 'cached'), [(UncachedUserRepository, False), (UserRepository, True)])
+async def test_loader_batches_are_cached_on_opt_in(
+    mocker: MockerFixture,
+    repository: Type[BaseRepository],
+    cached: bool,
+) -> None:
+    fetch_all = mocker.patch.object(repositories.database, 'fetch_all', mocker.AsyncMock(return_value=[]))
+    get_or_set = mocker.spy(repositories.query_cache, 'get_or_set')
+    keys = [uuid.uuid4(), uuid.uuid4()]
+
+    assert await repository.load_many(keys) == [None, None]
+
+    assert fetch_all.call_count == 1
+    assert get_or_set.called is cached
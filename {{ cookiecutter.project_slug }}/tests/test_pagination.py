@@ -0,0 +1,63 @@
+import uuid
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from sdk.exceptions.exceptions import AppException
+from sdk.pagination import CursorPaginationManager
+from sdk.repositories import PaginateMixin
+from sdk.responses import ResponseStatus
+
+items = sa.table('items', sa.column('name'), sa.column('created_at'), sa.column('uuid'))
+
+
+def compile_clause(clause: sa.sql.ClauseElement) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip() -> None:
+    values = [datetime(2024, 1, 1, 12, tzinfo=timezone.utc), date(2024, 1, 2), uuid.uuid4(), Decimal('1.50'), 'a', 1]
+
+    cursor = CursorPaginationManager.encode_cursor(['-created_at'], values, CursorPaginationManager.PREVIOUS)
+
+    assert CursorPaginationManager.decode_cursor(cursor) == (['-created_at'], values, CursorPaginationManager.PREVIOUS)
+
+
+@pytest.mark.parametrize('tamper', [lambda c: c[:-2], lambda c: 'x' + c, lambda c: c.replace('.', ''), lambda c: ''])
+def test_tampered_cursor_is_rejected(tamper: Callable[[str], str]) -> None:
+    cursor = CursorPaginationManager.encode_cursor(['name'], ['a'], CursorPaginationManager.NEXT)
+
+    with pytest.raises(AppException) as exc_info:
+        CursorPaginationManager.decode_cursor(tamper(cursor))
+    assert exc_info.value.custom_code == ResponseStatus.PAGINATION_PAGE_ERROR
+
+
+@pytest.mark.parametrize(
+    ('backwards', 'expected'),
+    [
+        (False, '(items.created_at, items.uuid) < (%(param_1)s, %(param_2)s)'),
+        (True, '(items.created_at, items.uuid) > (%(param_1)s, %(param_2)s)'),
+    ],
+)
+def test_keyset_clause_with_one_direction_compares_row_values(backwards: bool, expected: str) -> None:
+    keys = [('created_at', items.c.created_at, True), ('uuid', items.c.uuid, True)]
+
+    clause = PaginateMixin.get_keyset_clause(keys, ['2024-01-01', 'uuid'], backwards)
+
+    assert compile_clause(clause) == expected
+
+
+def test_keyset_clause_with_mixed_directions_expands_the_comparison() -> None:
+    keys = [('name', items.c.name, False), ('created_at', items.c.created_at, True)]
+
+    clause = PaginateMixin.get_keyset_clause(keys, ['a', '2024-01-01'], False)
+
+    assert compile_clause(clause) == (
+        'items.name > %(name_1)s OR items.name = %(name_2)s AND items.created_at < %(created_at_1)s'
+    )
@@ -0,0 +1,132 @@
+import asyncio
+import enum
+import uuid
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from datetime import timezone
+from decimal import Decimal
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from utils import MockCacheBackend
+
+from sdk.query_cache import QueryCache
+
+
+class Status(enum.Enum):
+    ACTIVE = 'active'
+
+
+items = sa.table(
+    'items',
+    sa.column('uuid', postgresql.UUID(as_uuid=True)),
+    sa.column('name', sa.String),
+    sa.column('created_at', sa.DateTime(timezone=True)),
+    sa.column('birthday', sa.Date),
+    sa.column('opens_at', sa.Time),
+    sa.column('duration', sa.Interval),
+    sa.column('price', sa.Numeric(12, 2)),
+    sa.column('status', sa.Enum(Status)),
+    sa.column('tags', postgresql.ARRAY(postgresql.UUID(as_uuid=True))),
+    sa.column('extra', postgresql.JSONB),
+)
+QUERY = sa.select([items]).where(items.c.name == 'item')
+
+
+def make_rows() -> List[Dict[str, Any]]:
+    return [
+        {
+            'uuid': uuid.uuid4(),
+            'name': 'item',
+            'created_at': datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'birthday': date(2000, 2, 29),
+            'opens_at': time(9, 0, 0, 5),
+            'duration': timedelta(days=1, microseconds=7),
+            'price': Decimal('0.10'),
+            'status': Status.ACTIVE,
+            'tags': [uuid.uuid4(), None],
+            'extra': {'created_at': '2024-01-01', 'count': 1},
+        },
+    ]
+
+
+async def fail() -> None:
+    raise AssertionError('The result should be cached')
+
+
+@pytest.fixture()
+def query_cache(redis: MockCacheBackend) -> QueryCache:
+    return QueryCache(redis)
+
+
+@pytest.mark.asyncio()
+async def test_cached_rows_keep_their_types(query_cache: QueryCache) -> None:
+    rows = make_rows()
+
+    async def load() -> List[Dict[str, Any]]:
+        return rows
+
+    assert await query_cache.get_or_set(QUERY, load, 60, ('items',)) is rows
+    (cached,) = await query_cache.get_or_set(QUERY, fail, 60, ('items',))
+
+    assert cached == rows[0]
+    assert [type(value) for value in cached.values()] == [type(value) for value in rows[0].values()]
+    assert str(cached['price']) == '0.10'
+
+
+@pytest.mark.asyncio()
+async def test_invalidated_tag_is_a_miss(query_cache: QueryCache) -> None:
+    rows, other_rows = make_rows(), make_rows()
+
+    async def load() -> List[Dict[str, Any]]:
+        return rows
+
+    async def load_other() -> List[Dict[str, Any]]:
+        return other_rows
+
+    await query_cache.get_or_set(QUERY, load, 60, ('items',))
+    await query_cache.invalidate('items')
+
+    assert await query_cache.get_or_set(QUERY, load_other, 60, ('items',)) is other_rows
+    assert await query_cache.get_or_set(QUERY, fail, 60, ('items',)) == other_rows
+
+
+@pytest.mark.asyncio()
+async def test_concurrent_misses_share_one_query(query_cache: QueryCache) -> None:
+    calls = 0
+    released = asyncio.Event()
+
+    async def load() -> List[Dict[str, Any]]:
+        nonlocal calls
+        calls += 1
+        await released.wait()
+        return [{'name': 'item'}]
+
+    leader = asyncio.create_task(query_cache.get_or_set(QUERY, load, 60, ('items',)))
+    follower = asyncio.create_task(query_cache.get_or_set(QUERY, load, 60, ('items',)))
+    await asyncio.sleep(0.01)
+    # A cancelled caller does not cancel the query the others wait for
+    leader.cancel()
+    released.set()
+
+    assert await follower == [{'name': 'item'}]
+    assert leader.cancelled()
+    assert calls == 1
+    assert not query_cache._inflight
+
+
+@pytest.mark.asyncio()
+async def test_failed_query_is_not_cached(query_cache: QueryCache) -> None:
+    async def load() -> None:
+        raise ValueError('Query failed')
+
+    with pytest.raises(ValueError, match='Query failed'):
+        await query_cache.get_or_set(QUERY, load, 60, ('items',))
+    assert not query_cache._inflight
+    assert await query_cache.redis.get(f'qc:{query_cache.get_digest(QUERY)}') is None
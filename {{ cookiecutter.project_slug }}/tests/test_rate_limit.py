@@ -0,0 +1,46 @@
+import pytest
+from rate_limit import RateLimitAlgorithm
+from rate_limit import RateLimiter
+from utils import MockCacheBackend
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('algorithm', list(RateLimitAlgorithm))
+async def test_limit_is_enforced(redis: MockCacheBackend, algorithm: RateLimitAlgorithm) -> None:
+    limiter = RateLimiter('login', limit=3, period=60, algorithm=algorithm)
+
+    results = [await limiter.hit(redis, '127.0.0.1') for _ in range(4)]
+
+    assert results[:3] == [(True, 0)] * 3
+    allowed, retry_after = results[3]
+    assert not allowed
+    assert 0 < retry_after <= 60
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('algorithm', list(RateLimitAlgorithm))
+async def test_identifiers_are_limited_separately(redis: MockCacheBackend, algorithm: RateLimitAlgorithm) -> None:
+    limiter = RateLimiter('login', limit=1, period=60, algorithm=algorithm)
+
+    assert await limiter.hit(redis, '127.0.0.1') == (True, 0)
+    assert await limiter.hit(redis, '127.0.0.2') == (True, 0)
+    assert not (await limiter.hit(redis, '127.0.0.1'))[0]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('algorithm', list(RateLimitAlgorithm))
+async def test_block_is_applied_once_exceeded(redis: MockCacheBackend, algorithm: RateLimitAlgorithm) -> None:
+    limiter = RateLimiter('verify', limit=1, period=1, algorithm=algorithm, block=300)
+    await limiter.hit(redis, 'user')
+
+    assert await limiter.hit(redis, 'user') == (False, 300)
+    # The block outlives the window
+    await redis.delete(limiter.get_keys('user')[0])
+    allowed, retry_after = await limiter.hit(redis, 'user')
+    assert not allowed
+    assert 299 <= retry_after <= 300
+
+
+def test_invalid_limit() -> None:
+    with pytest.raises(ValueError, match='greater than 0'):
+        RateLimiter('login', limit=0, period=60)
@@ -0,0 +1,18 @@
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.dialects import postgresql
+
+from api.v1.users.repositories import UserRepository
+from sdk import repositories
+
+
+@pytest.mark.asyncio()
+async def test_exists_stops_at_the_first_row(mocker: MockerFixture) -> None:
+    fetch_val = mocker.patch.object(repositories.database, 'fetch_val', mocker.AsyncMock(return_value=True))
+
+    assert await UserRepository.exists().where(phone_number='+380501234567').execute() is True
+
+    (query,), _ = fetch_val.call_args
+    assert ' '.join(str(query.compile(dialect=postgresql.dialect())).split()) == (
+        'SELECT EXISTS (SELECT 1 FROM users WHERE users.phone_number = %(phone_number_1)s) AS anon_1'
+    )
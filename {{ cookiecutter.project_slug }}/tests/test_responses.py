@@ -0,0 +1,107 @@
+import datetime
+import uuid
+from enum import Enum
+from typing import Any
+from typing import List
+from typing import Optional
+
+import pytest
+from config import settings
+from fastapi import APIRouter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import Field
+from pydantic import ValidationError
+
+from sdk.responses import DefaultResponse
+from sdk.responses import DefaultResponseSchema
+from sdk.responses import ResponseStatus
+from sdk.routing import DefaultResponseRoute
+from sdk.routing import DefaultResponseRouter
+from sdk.schemas import BaseSchema
+from sdk.schemas import PaginatedSchema
+
+
+class Color(str, Enum):
+    RED = 'red'
+
+
+class Owner(BaseSchema):
+    uuid: uuid.UUID
+    password: str = Field(exclude=True)
+
+
+class Item(BaseSchema):
+    name: str
+    color: Color
+    created_at: datetime.datetime
+    owner: Owner
+    tags: List[str] = []
+    price: Optional[float] = None
+
+
+def make_item() -> Item:
+    return Item(
+        name='Item',
+        color=Color.RED,
+        created_at=datetime.datetime(2024, 1, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        owner=Owner(uuid=uuid.uuid4(), password='secret'),
+        tags=['new'],
+    )
+
+
+@pytest.mark.parametrize(
+    'content',
+    [
+        None,
+        'text',
+        {'count': 1, 'at': datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)},
+        make_item(),
+        [make_item(), make_item()],
+        PaginatedSchema(total_count=1, page_count=1, next=None, previous=None, results=[make_item()]),
+    ],
+)
+def test_render_matches_the_envelope_model(content: Any) -> None:  # noqa: ANN401
+    assert DefaultResponse(content=content).body == DefaultResponseSchema(data=content).json().encode()
+
+
+def test_render_normalizes_details() -> None:
+    details = [{'field': 'name', 'message': 'Required', 'extra': 'dropped'}]
+
+    response = DefaultResponse(custom_code=ResponseStatus.VALIDATION_ERROR, message='Invalid', details=details)
+
+    expected = DefaultResponseSchema(custom_code=ResponseStatus.VALIDATION_ERROR, message='Invalid', details=details)
+    assert response.body == expected.json().encode()
+    assert b'dropped' not in response.body
+
+
+def test_render_rejects_an_unknown_custom_code() -> None:
+    with pytest.raises(ValidationError):
+        DefaultResponse(custom_code=1, content=None)
+
+
+def make_router() -> DefaultResponseRouter:
+    sub_router = APIRouter()
+
+    @sub_router.get('/item', response_model=DefaultResponseSchema[Item])
+    async def get_item() -> DefaultResponse:
+        return DefaultResponse(content={'name': 'Item'})
+
+    router = DefaultResponseRouter(route_class=DefaultResponseRoute)
+    router.include_router(sub_router, prefix='/items')
+    return router
+
+
+@pytest.mark.parametrize('validation', [False, True])
+def test_included_routes_validate_responses_when_enabled(monkeypatch: pytest.MonkeyPatch, validation: bool) -> None:
+    monkeypatch.setattr(settings, 'RESPONSE_VALIDATION', validation)
+    app = FastAPI()
+    app.include_router(make_router())
+    (route,) = [route for route in app.routes if getattr(route, 'path', None) == '/items/item']
+
+    assert type(route) is DefaultResponseRoute
+    if validation:
+        with pytest.raises(ValidationError, match='color'):
+            TestClient(app).get('/items/item')
+    else:
+        assert TestClient(app).get('/items/item').json()['data'] == {'name': 'Item'}
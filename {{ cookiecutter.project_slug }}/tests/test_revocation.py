@@ -0,0 +1,123 @@
+import asyncio
+import time
+import uuid
+from typing import Any
+from typing import Dict
+from typing import Generator
+
+import pytest
+from config import settings
+from pytest_mock import MockerFixture
+from utils import MockCacheBackend
+
+from api.v1.auth.services import RevocationService
+from api.v1.auth.services import TokenService
+
+
+def make_payload(user_id: str, iat: float) -> Dict[str, Any]:
+    return {'sub': user_id, 'jti': uuid.uuid4().hex, 'iat': iat, 'exp': int(time.time()) + 60}
+
+
+async def revoke_tokens(redis: MockCacheBackend, *payloads: Dict[str, Any]) -> None:
+    async with redis.pipeline() as pipe:
+        for payload in payloads:
+            RevocationService.revoke_token(pipe, payload)
+        await pipe.execute()
+
+
+async def revoke_user(redis: MockCacheBackend, user_id: str) -> int:
+    async with redis.pipeline() as pipe:
+        await RevocationService.revoke_user(pipe, user_id).execute()
+    return int(await redis.get(RevocationService.get_revocation_key(user_id)))
+
+
+@pytest.mark.asyncio()
+async def test_epoch_revokes_tokens_issued_before_it(redis: MockCacheBackend) -> None:
+    epoch = await revoke_user(redis, 'user')
+
+    assert await RevocationService.is_revoked(redis, make_payload('user', epoch / 1000 - 0.001))
+    # Issued in the same second, after the revocation
+    assert not await RevocationService.is_revoked(redis, make_payload('user', epoch / 1000))
+    assert not await RevocationService.is_revoked(redis, make_payload('other', epoch / 1000 - 1))
+
+
+@pytest.mark.asyncio()
+async def test_denylisted_jti_is_revoked(redis: MockCacheBackend) -> None:
+    payload = make_payload('user', TokenService.get_issued_at())
+    await revoke_tokens(redis, payload)
+
+    assert await RevocationService.is_revoked(redis, payload)
+    assert not await RevocationService.is_revoked(redis, make_payload('user', payload['iat']))
+
+
+@pytest.fixture()
+def local_tier() -> Generator[None, None, None]:
+    revoked_jtis = RevocationService.revoked_jtis
+    yield
+    RevocationService.revoked_jtis = revoked_jtis
+    RevocationService.revoked_jtis.clear()
+    RevocationService.epochs.clear()
+    RevocationService.is_synced = False
+    RevocationService._synchronized_at = 0.0
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('local_tier')
+async def test_synchronize_sizes_the_filter_and_drains_the_backlog(
+    redis: MockCacheBackend,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, 'REVOCATION_FILTER_CAPACITY', 2)
+    expired = {**make_payload('user', 0), 'exp': int(time.time()) - 1}
+    await revoke_tokens(redis, *[{**make_payload('user', 0), 'jti': jti} for jti in ('a', 'b', 'c')])
+    async with redis.pipeline() as pipe:
+        await pipe.zadd(RevocationService.denylist_key, {expired['jti']: expired['exp']}).execute()
+    pubsub = redis.pubsub(ignore_subscribe_messages=False)
+    await pubsub.subscribe(RevocationService.channel)
+    await redis.publish(RevocationService.channel, 'jti:d')
+
+    await RevocationService._synchronize(redis, pubsub)
+
+    assert RevocationService.is_synced
+    assert RevocationService.revoked_jtis.capacity == 6
+    assert not RevocationService.revoked_jtis.is_saturated
+    assert all(jti in RevocationService.revoked_jtis for jti in ('a', 'b', 'c', 'd'))
+    assert expired['jti'] not in RevocationService.revoked_jtis
+    async with redis.pipeline() as pipe:
+        (size,) = await pipe.zcard(RevocationService.denylist_key).execute()
+    assert size == 3
+    assert not RevocationService._can_synchronize()
+    await pubsub.close()
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('local_tier')
+async def test_synced_tier_skips_redis_for_unknown_jti(redis: MockCacheBackend) -> None:
+    pubsub = redis.pubsub(ignore_subscribe_messages=False)
+    await pubsub.subscribe(RevocationService.channel)
+    await RevocationService._synchronize(redis, pubsub)
+    await pubsub.close()
+    payload = make_payload('user', TokenService.get_issued_at())
+
+    assert not await RevocationService.is_revoked(redis, payload)
+    # Written behind the back of the listener: the negative epoch and the filter are trusted
+    async with redis.pipeline() as pipe:
+        await pipe.zadd(RevocationService.denylist_key, {payload['jti']: payload['exp']}).execute()
+    assert not await RevocationService.is_revoked(redis, payload)
+    RevocationService._apply(f'jti:{payload["jti"]}')
+    assert await RevocationService.is_revoked(redis, payload)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('local_tier')
+async def test_stopped_listener_is_not_synced(redis: MockCacheBackend, mocker: MockerFixture) -> None:
+    mocker.patch.object(RevocationService, '_apply', side_effect=ValueError)
+    listener = asyncio.create_task(RevocationService._listen(redis))
+    while not RevocationService.is_synced:
+        await asyncio.sleep(0)
+
+    await redis.publish(RevocationService.channel, 'jti:a')
+
+    with pytest.raises(ValueError):
+        await listener
+    assert not RevocationService.is_synced
@@ -0,0 +1,102 @@
+import datetime
+import uuid
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import jwt
+import pytest
+from config import settings
+from pytest_mock import MockerFixture
+from utils import MockCacheBackend
+
+from api.v1.auth.schemas import Session
+from api.v1.auth.services import SessionService
+from api.v1.auth.services import TokenService
+from api.v1.users.schemas import User
+from api.v1.users.services import UserService
+from sdk.exceptions.exceptions import AppException
+from sdk.responses import ResponseStatus
+
+
+@pytest.fixture(autouse=True)
+def secret_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'SECRET_KEY', 'secret-key-of-the-tests-0123456789')
+
+
+def make_token(payload: Optional[Dict[str, Any]]) -> str:
+    return TokenService.create_access(
+        payload=payload,
+        secret_key=settings.SECRET_KEY,
+        sub=str(uuid.uuid4()),
+        expires_in=datetime.datetime.utcnow() + datetime.timedelta(minutes=5),
+        algorithm=settings.AUTH_JWT_ALGORITHM,
+    )
+
+
+def test_verified_token_is_decoded_once(mocker: MockerFixture) -> None:
+    token = make_token({'name': 'User'})
+    decode = mocker.spy(jwt, 'decode')
+
+    digest = TokenService.get_digest(token)
+    assert TokenService.get_payload(token, digest) == TokenService.get_payload(token)
+
+    assert decode.call_count == 1
+
+
+def test_verified_token_is_not_shared() -> None:
+    token = make_token({'uuid': str(uuid.uuid4()), 'name': 'User', 'phone_number': '+380501234567'})
+
+    TokenService.get_payload(token)['data']['name'] = 'Changed'
+    user = TokenService.get_user(token)
+    user.name = 'Changed'
+
+    assert TokenService.get_payload(token)['data']['name'] == 'User'
+    assert TokenService.get_user(token).name == 'User'
+
+
+def test_invalid_token() -> None:
+    token = make_token(None)
+
+    assert TokenService.get_payload(token[:-2]) is None
+    assert TokenService.get_user(token) is None
+
+
+@pytest.mark.asyncio()
+async def test_compact_claims_read_the_current_profile(
+    redis: MockCacheBackend,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, 'AUTH_JWT_COMPACT_CLAIMS', True)
+    user = User(uuid=uuid.uuid4(), name='User', phone_number='+380501234567')
+    session = await SessionService.create_session(redis=redis, user=user)
+
+    assert 'data' not in TokenService.get_payload(session.access_token)
+    assert (await SessionService.get_user(session.access_token, redis)).name == 'User'
+    await redis.set(SessionService.get_profile_key(user.uuid), user.copy(update={'name': 'Changed'}).json(), 60)
+    assert (await SessionService.get_user(session.access_token, redis)).name == 'Changed'
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('compact_claims', [False, True])
+async def test_refresh_with_an_expired_access_token(
+    redis: MockCacheBackend,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: MockerFixture,
+    compact_claims: bool,
+) -> None:
+    monkeypatch.setattr(settings, 'AUTH_JWT_COMPACT_CLAIMS', compact_claims)
+    user = User(uuid=uuid.uuid4(), name='User', phone_number='+380501234567')
+    mocker.patch.object(UserService, 'get_user', mocker.AsyncMock(return_value=user))
+    now = datetime.datetime.utcnow()
+    expires = [now - datetime.timedelta(minutes=1), now + datetime.timedelta(minutes=5)]
+    mocker.patch.object(Session, 'get_access_token_expires', side_effect=expires)
+    session = await SessionService.create_session(redis=redis, user=user)
+    assert TokenService.get_payload(session.access_token) is None
+
+    refreshed = await SessionService.refresh_session(redis, session.access_token, session.refresh_token)
+
+    assert TokenService.get_payload(refreshed.access_token)['sub'] == str(user.uuid)
+    with pytest.raises(AppException) as exc_info:
+        await SessionService.refresh_session(redis, session.access_token, session.refresh_token)
+    assert exc_info.value.custom_code == ResponseStatus.INVALID_ACCESS_OR_REFRESH_TOKEN
@@ -1,13 +1,13 @@
-import contextlib
 import os
 from argparse import Namespace
 from types import SimpleNamespace
-from typing import Iterable
 from typing import Optional
 from typing import Union
 
 from alembic.config import Config
+from cache import RedisBackend
 from config import settings
+from fakeredis.aioredis import FakeRedis
 
 
 def make_alembic_config(
@@ -44,41 +44,11 @@ def alembic_config_from_url(pg_url: Optional[str] = None) -> Config:
     return make_alembic_config(cmd_options)
 
 
-class MockCacheBackend:
-    """Mock Cache Backend"""
+class MockCacheBackend(RedisBackend):
+    """Redis backend over an in-memory fakeredis server, Lua scripts are run by lupa"""
 
     def __init__(self) -> None:
-        self._db = {}
-
-    async def get(self, key: str) -> Optional[str]:
-        return self._db.get(key)
-
-    async def delete(self, key: str) -> None:
-        with contextlib.suppress(KeyError):
-            self._db.pop(key)
-
-    async def keys(self, match: str) -> Iterable[str]:
-        keywords = match.split('*')
-        return [k for k in self._db.keys() if all(kw in k for kw in keywords)]
-
-    async def set(self, key: str, value: Union[str, bytes, int], expire: int) -> None:
-        self._db[key] = value
-
-    async def setnx(self, key: str, value: Union[str, bytes, int], expire: int) -> None:
-        v = self._db.get(key)  # pragma: no cover
-        if v is None:  # pragma: no cover
-            self._db[key] = value  # pragma: no cover
-
-    async def incr(self, key: str) -> str:
-        v = self._db.get(key)
-        if v is not None:
-            self._db[key] = int(v) + 1
-
-    async def ping(self) -> bool:
-        return True
-
-    async def close(self) -> None:
-        return
+        super().__init__(redis=FakeRedis())
 
 
 class StringIOMock: